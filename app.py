@@ -1,9 +1,22 @@
 import hashlib
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_file
+from flask import (Flask, render_template, request, redirect, url_for, flash, session, send_file, jsonify,
+                   Response, stream_with_context)
 from report_generator import generate_simple_report
 import os
-from detect import load_model, predict_video
-from utils import compute_file_sha256
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import closing
+from detect import (load_model, iter_predict_video, model_identity, FRAME_SAMPLE_RATE, FRAME_SAMPLING,
+                    FRAME_BUDGET, MAX_SAMPLED_FRAMES, THRESHOLD, BATCH_SIZE, EARLY_STOP_MIN_FRAMES,
+                    EARLY_STOP_DELTA, EARLY_STOP_CHECKS, DEDUP_MAX_DISTANCE, DEDUP_WINDOW)
+from result_cache import ResultCache
+from job_queue import JobQueue, JobCancelled, FINISHED, DONE, CANCELLED
+from inference_pool import InferencePool, INFERENCE_WORKERS
+from uploads import UploadRequest, hash_only, upload_sha256
+from media_store import MediaStore, MEDIA_STORE_PATH
+from chain_index import ChainIndex
+from registry_client import RegistryClient, load_registry
 from web3 import Web3
 import json
 from datetime import datetime
@@ -16,21 +29,66 @@ ADMIN_PASSWORD = "admin123"
 
 # Flask setup
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = 'static/uploads'
+app.request_class = UploadRequest   # uploads are hashed while they are received
+app.config['UPLOAD_FOLDER'] = MEDIA_STORE_PATH     # uploads are spooled next to the store objects
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this!
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024
 
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'flv', 'webm'}
 
-# Load detection model once
-model = load_model()
+# Load detection model once, in-process, unless a worker pool does inference
+model = load_model() if INFERENCE_WORKERS == 0 else None
+inference_pool = None   # created on first use (spawned workers re-import this module)
+inference_pool_lock = threading.Lock()
+
+# dedup: near-identical talking-head frames reuse an earlier prediction.
+# Early stop stays off: each of its rounds decodes the video again, which
+# only pays off where inference dominates (see detect.early_stop_rounds)
+DETECTION_OPTIONS = {'dedup': True}
+
+# Uploaded videos, stored once per SHA-256 under a disk quota (sweeper started by init_app)
+media_store = MediaStore()
+
+# Detection results keyed by video hash + model + settings (re-uploads skip detection)
+result_cache = ResultCache()
+
+# Shared by the concurrent analysis stages: the blockchain lookup only needs
+# the hash (known once the upload is received), so it runs here while the
+# model works through the video
+ANALYSIS_THREADS = int(os.getenv("ANALYSIS_THREADS", "4"))
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_THREADS, thread_name_prefix="analysis")
+
+# Seconds between job status polls of a /stream/<job_id> progress stream
+STREAM_POLL_INTERVAL = 0.5
+
+def get_inference_pool():
+    global inference_pool
+    with inference_pool_lock:
+        if inference_pool is None:
+            inference_pool = InferencePool(workers=INFERENCE_WORKERS)
+    return inference_pool
+
+def detection_cache_key(video_hash):
+    # every setting that can change the result, including the early stop ones
+    # that decide where a run may stop when DETECTION_OPTIONS enables it
+    return ResultCache.make_key(video_hash, model_identity(),
+                                sample_rate=FRAME_SAMPLE_RATE, threshold=THRESHOLD,
+                                sampling=FRAME_SAMPLING, frame_budget=FRAME_BUDGET,
+                                max_frames=MAX_SAMPLED_FRAMES, batch_size=BATCH_SIZE,
+                                min_frames=EARLY_STOP_MIN_FRAMES, delta=EARLY_STOP_DELTA,
+                                early_stop_checks=EARLY_STOP_CHECKS,
+                                dedup_distance=DEDUP_MAX_DISTANCE, dedup_window=DEDUP_WINDOW,
+                                **DETECTION_OPTIONS)
 
 # Initialize blockchain variables
 GANACHE_URL = os.getenv("GANACHE_URL")
 w3 = None
 contract = None
 contract_address = None
+registry = None         # RegistryClient: hex hashes in, v1 string / v2 bytes32 keys out
 blockchain_connected = False
+chain_index = None      # local MediaRegistered index (see init_app), verifications skip the RPC when it is fresh
+CHAIN_INDEX_ENABLED = os.getenv("CHAIN_INDEX", "1") == "1"
 
 # Try to connect to blockchain
 if GANACHE_URL:
@@ -45,17 +103,10 @@ if GANACHE_URL:
             
             # Try to load contract
             try:
-                with open("contract/MediaRegistry.json", "r") as f:
-                    contract_data = json.load(f)
-                
-                contract_address = contract_data["address"]
-                contract_abi = contract_data["abi"]
-                
-                contract = w3.eth.contract(
-                    address=contract_address,
-                    abi=contract_abi
-                )
-                print(f"✅ Contract loaded: {contract_address}")
+                contract = load_registry(w3)
+                contract_address = contract.address
+                registry = RegistryClient(w3, contract)
+                print(f"✅ Contract loaded: {contract_address} (MediaRegistry v{registry.version})")
                 
             except FileNotFoundError:
                 print("⚠️ Contract file not found. Run deploy_and_register.py first")
@@ -99,6 +150,205 @@ def get_blockchain_stats():
     
     return stats
 
+def lookup_blockchain(video_hash):
+    """(registered, blockchain_data) for a video hash from the MediaRegistry contract"""
+    if not (blockchain_connected and contract):
+        return False, {
+            'verified': False,
+            'hash': video_hash,
+            'error': 'Blockchain not connected'
+        }
+    try:
+        # Local event index first; verifyMedia on the contract if it is disabled or lagging
+        indexed = chain_index.lookup(video_hash) if chain_index else None
+        exists, description, uploader, timestamp = indexed or registry.verify(video_hash)
+    except Exception as e:
+        return False, {
+            'verified': False,
+            'hash': video_hash,
+            'error': str(e)
+        }
+    if not exists:
+        return False, {
+            'verified': False,
+            'hash': video_hash,
+            'message': 'Video not registered on blockchain'
+        }
+    return True, {
+        'verified': True,
+        'hash': video_hash,
+        'description': description,
+        'uploader': uploader,
+        'timestamp': timestamp,
+        'registered_date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp > 0 else "Unknown"
+    }
+
+def refresh_chain_index():
+    """
+    Index a registration this process just mined, so re-checking the video
+    doesn't trust a miss from an index that hasn't polled since.
+    """
+    if chain_index is None:
+        return
+    try:
+        chain_index.sync()
+    except Exception as e:
+        print(f"⚠️ Chain index sync failed: {e}")
+
+def timed(fn, *args):
+    """(fn(*args), wall seconds)"""
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+def start_chain_lookup(video_hash):
+    """lookup_blockchain on the shared executor; future of ((registered, blockchain_data), seconds)"""
+    return analysis_executor.submit(timed, lookup_blockchain, video_hash)
+
+def stage_report(start, hash_seconds, detect_seconds, chain_seconds):
+    """Per-stage seconds plus the end-to-end time of an analysis started at `start` (perf_counter)"""
+    return {
+        'hash': round(hash_seconds or 0.0, 4),
+        'detect': round(detect_seconds, 4),
+        'chain': round(chain_seconds, 4),
+        'total': round(time.perf_counter() - start, 4)
+    }
+
+def show_result(filename, filepath, video_hash, result, registered, blockchain_data, stage_timings=None):
+    """Remember the analysis in the session and render result.html"""
+    fake_prob = round(result["avg_fake_probability"] * 100, 2)
+    is_fake = result["is_fake"]
+    frame_count = result.get("frame_count", 0)
+    
+    # Store file info in session for potential registration
+    session['last_video'] = {
+        'path': filepath,
+        'hash': video_hash,
+        'filename': filename,
+        'is_fake': is_fake
+    }
+    
+    # Store analysis data for report generation
+    session['last_analysis'] = {
+        'filename': filename,
+        'hash': video_hash,
+        'is_fake': is_fake,
+        'fake_prob': fake_prob,
+        'frame_count': frame_count,
+        'registered': registered,
+        'desc': blockchain_data.get('description', ''),
+        'uploader': blockchain_data.get('uploader', ''),
+        'timestamp': blockchain_data.get('registered_date', '')
+    }
+    
+    return render_template(
+        'result.html',
+        filename=filename,
+        fake_prob=fake_prob,
+        is_fake=is_fake,
+        frame_count=frame_count,
+        registered=registered,
+        blockchain_data=blockchain_data,
+        blockchain_connected=blockchain_connected,
+        stage_timings=stage_timings,
+        show_report_button=True
+    )
+
+def analyse_upload(payload, check_cancelled, report_progress):
+    """
+    Job handler for /upload and /upload_stream: detect (result cache first)
+    while the blockchain lookup runs concurrently on the shared executor; the
+    hash was computed while the upload was received. check_cancelled() runs
+    between stages and between detection batches, report_progress() gets
+    each batch's progress update for /stream/<job_id>.
+    """
+    start = time.perf_counter()
+    video_hash = payload['hash']
+    # still in the store unless the quota evicted it while the job was queued
+    filepath = media_store.get(video_hash)
+    if filepath is None:
+        raise RuntimeError('Uploaded video was evicted from the media store, please upload it again')
+    check_cancelled()
+    
+    chain = start_chain_lookup(video_hash)
+    try:
+        result, detect_seconds = timed(detect_upload, filepath, video_hash, check_cancelled, report_progress)
+    except BaseException:
+        chain.cancel()
+        raise
+    (registered, blockchain_data), chain_seconds = chain.result()
+    return {
+        'filename': payload['filename'],
+        'path': filepath,
+        'hash': video_hash,
+        'result': result,
+        'registered': registered,
+        'blockchain_data': blockchain_data,
+        'stage_timings': stage_report(start, payload.get('hash_seconds'), detect_seconds, chain_seconds)
+    }
+
+def detect_upload(filepath, video_hash, check_cancelled, report_progress=None):
+    """
+    Detection result for a stored upload, from the result cache or the model.
+    Inline inference passes each batch's progress to report_progress; a
+    worker process can't stream it back.
+    """
+    cache_key = detection_cache_key(video_hash)
+    result = result_cache.get(cache_key)
+    if result is not None:
+        return result
+    if INFERENCE_WORKERS > 0:
+        # a worker process can't be interrupted mid-video: poll so a cancel
+        # drops a job that hasn't started and skips the remaining stages
+        future = get_inference_pool().submit(filepath, **DETECTION_OPTIONS)
+        while not future.done():
+            try:
+                check_cancelled()
+            except JobCancelled:
+                future.cancel()
+                raise
+            wait([future], timeout=1)
+        result = future.result()
+    else:
+        with closing(iter_predict_video(filepath, model, **DETECTION_OPTIONS)) as updates:
+            for update in updates:
+                check_cancelled()
+                if update['done']:
+                    result = update['result']
+                elif report_progress:
+                    report_progress(update)
+    result_cache.put(cache_key, video_hash, result)
+    return result
+
+# Upload analysis runs on these background threads (started by init_app); jobs persist in SQLite
+job_queue = JobQueue(analyse_upload)
+background_started = False
+background_lock = threading.Lock()
+
+def init_app():
+    """
+    Start the background work of the serving process: job workers, media
+    store sweeper and chain index. Not done at import, because spawned
+    inference workers re-import this module as __mp_main__ and would claim
+    jobs inside a worker. `python app.py` calls this before serving; under a
+    WSGI server (gunicorn, flask run) the first request does, so queued jobs
+    are picked up from then on (call app.init_app() from a post-fork hook to
+    start right away).
+    """
+    global chain_index, background_started
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+    media_store.start_sweeper()
+    if CHAIN_INDEX_ENABLED and contract is not None:
+        chain_index = ChainIndex(w3, contract).start()
+    job_queue.start()
+
+@app.before_request
+def start_background_work():
+    init_app()
+
 @app.route('/')
 def index():
     # Get blockchain stats
@@ -131,6 +381,90 @@ def verify_only_page():
 
 @app.route('/upload', methods=['POST'])
 def upload_video():
+    """Save the upload and queue it for analysis; returns the job id at once (202)"""
+    if 'video' not in request.files:
+        return jsonify({'error': 'No file selected'}), 400
+    
+    file = request.files['video']
+    
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type. Allowed: mp4, avi, mov, mkv, flv, webm'}), 400
+    
+    # Store the upload (hashed on the way in); detection and the blockchain lookup run in the job
+    filename = file.filename
+    hash_seconds = getattr(file.stream, 'hash_seconds', None)
+    video_hash, filepath = media_store.add_upload(file)
+    
+    job_id = job_queue.submit({'filename': filename, 'path': filepath, 'hash': video_hash,
+                               'hash_seconds': hash_seconds})
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('job_status', job_id=job_id),
+        'result_url': url_for('job_result', job_id=job_id),
+        'cancel_url': url_for('cancel_job', job_id=job_id)
+    }), 202
+
+def job_summary(job):
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'filename': job['payload']['filename'],
+        'error': job['error'],
+        'cancel_requested': job['cancel_requested'],
+        'created': job['created'],
+        'started': job['started'],
+        'finished': job['finished']
+    }
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status of an analysis job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job_summary(job))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """
+    Analysis result as JSON (202 while the job is pending, 409 if it failed
+    or was cancelled); ?format=html renders the usual result page.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] not in FINISHED:
+        return jsonify(job_summary(job)), 202
+    if job['status'] != DONE:
+        return jsonify(job_summary(job)), 409
+    
+    outcome = job['result']
+    if request.args.get('format') == 'html':
+        return show_result(outcome['filename'], outcome['path'], outcome['hash'], outcome['result'],
+                           outcome['registered'], outcome['blockchain_data'], outcome.get('stage_timings'))
+    return jsonify({**job_summary(job), **outcome})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued job, or ask a running one to stop at its next checkpoint"""
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({'error': 'Job already finished'}), 409
+    return jsonify(job_summary(job_queue.get(job_id)))
+
+@app.route('/jobs')
+def job_counts():
+    """Number of jobs per status"""
+    return jsonify(job_queue.counts())
+
+@app.route('/upload_stream', methods=['POST'])
+def upload_stream():
+    """Queue the upload like /upload and show a progress page that follows the job over /stream/<job_id>"""
     if 'video' not in request.files:
         flash('No file selected', 'error')
         return redirect(url_for('index'))
@@ -145,95 +479,82 @@ def upload_video():
         flash('Invalid file type. Allowed: mp4, avi, mov, mkv, flv, webm', 'error')
         return redirect(url_for('index'))
     
-    # Save uploaded file
     filename = file.filename
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    file.save(filepath)
-    
-    # Detect fake/real
-    try:
-        result = predict_video(filepath, model)
-        fake_prob = round(result["avg_fake_probability"] * 100, 2)
-        is_fake = result["is_fake"]
-        frame_count = result.get("frame_count", 0)
-    except Exception as e:
-        flash(f'Detection error: {str(e)}', 'error')
-        return redirect(url_for('index'))
-    
-    # Compute hash and check blockchain
-    video_hash = compute_file_sha256(filepath)
-    registered = False
-    blockchain_data = {}
-    
-    if blockchain_connected and contract:
-        try:
-            # Use verifyMedia function from your contract
-            exists, description, uploader, timestamp = contract.functions.verifyMedia(video_hash).call()
-            
-            if exists:
-                registered = True
-                blockchain_data = {
-                    'verified': True,
-                    'hash': video_hash,
-                    'description': description,
-                    'uploader': uploader,
-                    'timestamp': timestamp,
-                    'registered_date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp > 0 else "Unknown"
-                }
-            else:
-                blockchain_data = {
-                    'verified': False,
-                    'hash': video_hash,
-                    'message': 'Video not registered on blockchain'
-                }
-        except Exception as e:
-            blockchain_data = {
-                'verified': False,
-                'hash': video_hash,
-                'error': str(e)
-            }
-    else:
-        blockchain_data = {
-            'verified': False,
-            'hash': video_hash,
-            'error': 'Blockchain not connected'
-        }
-    
-    # Store file info in session for potential registration
-    session['last_video'] = {
-        'path': filepath,
-        'hash': video_hash,
-        'filename': filename,
-        'is_fake': is_fake
-    }
-    
-    # Store analysis data for report generation
-    session['last_analysis'] = {
-        'filename': filename,
-        'hash': video_hash,
-        'is_fake': is_fake,
-        'fake_prob': fake_prob,
-        'frame_count': frame_count,
-        'registered': registered,
-        'desc': blockchain_data.get('description', ''),
-        'uploader': blockchain_data.get('uploader', ''),
-        'timestamp': blockchain_data.get('registered_date', '')
-    }
+    hash_seconds = getattr(file.stream, 'hash_seconds', None)
+    video_hash, filepath = media_store.add_upload(file)
     
-    return render_template(
-        'result.html',
-        filename=filename,
-        fake_prob=fake_prob,
-        is_fake=is_fake,
-        frame_count=frame_count,
-        registered=registered,
-        blockchain_data=blockchain_data,
-        blockchain_connected=blockchain_connected,
-        show_report_button=True
-    )
+    job_id = job_queue.submit({'filename': filename, 'path': filepath, 'hash': video_hash,
+                               'hash_seconds': hash_seconds})
+    return render_template('progress.html',
+                         job_id=job_id,
+                         filename=filename,
+                         blockchain_connected=blockchain_connected,
+                         contract_address=contract_address)
+
+def sse_event(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+@app.route('/stream/<job_id>')
+def stream_progress(job_id):
+    """
+    Server-Sent Events following an analysis job: its status while queued or
+    running, one event per scored batch with the running fake probability
+    (inline inference only), then a final {"done": true, "result_url": ...}
+    event (or an error event if it failed or was cancelled). Closing the
+    stream leaves the job running; an EventSource reconnect picks it up again.
+    """
+    def events():
+        last = None
+        last_progress = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                yield sse_event({'error': 'Unknown or expired analysis'})
+                return
+            if job['status'] == DONE:
+                result = job['result']['result']
+                yield sse_event({
+                    'done': True,
+                    'avg_fake_probability': result['avg_fake_probability'],
+                    'is_fake': result['is_fake'],
+                    'frames_scored': result.get('frames_scored', result.get('frame_count', 0)),
+                    'result_url': url_for('job_result', job_id=job_id, format='html')
+                })
+                return
+            if job['status'] in FINISHED:
+                reason = 'cancelled' if job['status'] == CANCELLED else f"error: {job['error']}"
+                yield sse_event({'error': f'Detection {reason}'})
+                return
+            if job['status'] != last:
+                last = job['status']
+                yield sse_event({'status': last})
+            if job['progress'] and job['progress'] != last_progress:
+                last_progress = job['progress']
+                yield sse_event(last_progress)
+            time.sleep(STREAM_POLL_INTERVAL)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Detection result cache hit/miss counters"""
+    return jsonify(result_cache.stats())
+
+@app.route('/chain_index_stats')
+def chain_index_stats():
+    """Local blockchain index status"""
+    if chain_index is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **chain_index.stats()})
+
+@app.route('/media_stats')
+def media_stats():
+    """Upload store size, quota and evictions"""
+    return jsonify(media_store.stats())
 
 @app.route('/verify_only', methods=['POST'])
+@hash_only
 def verify_only():
     """Only verify on blockchain without AI detection"""
     if 'video' not in request.files:
@@ -250,52 +571,12 @@ def verify_only():
         flash('Invalid file type', 'error')
         return redirect(url_for('index'))
     
-    # Save file temporarily
+    # Hashed while it was received, never written to disk
     filename = file.filename
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'temp_' + filename)
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    file.save(filepath)
-    
-    # Generate hash
-    video_hash = compute_file_sha256(filepath)
+    video_hash = upload_sha256(file)
     
     # Verify on blockchain
-    blockchain_data = {}
-    if blockchain_connected and contract:
-        try:
-            exists, description, uploader, timestamp = contract.functions.verifyMedia(video_hash).call()
-            
-            if exists:
-                blockchain_data = {
-                    'verified': True,
-                    'hash': video_hash,
-                    'description': description,
-                    'uploader': uploader,
-                    'timestamp': timestamp,
-                    'registered_date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp > 0 else "Unknown"
-                }
-            else:
-                blockchain_data = {
-                    'verified': False,
-                    'hash': video_hash,
-                    'message': 'Video not registered on blockchain'
-                }
-        except Exception as e:
-            blockchain_data = {
-                'verified': False,
-                'hash': video_hash,
-                'error': str(e)
-            }
-    else:
-        blockchain_data = {
-            'verified': False,
-            'hash': video_hash,
-            'error': 'Blockchain not connected'
-        }
-    
-    # Clean up temp file
-    if os.path.exists(filepath):
-        os.remove(filepath)
+    _, blockchain_data = lookup_blockchain(video_hash)
     
     # IMPORTANT: Return the result page with the verification data
     return render_template('verify_result.html',  # This renders the result page
@@ -336,7 +617,7 @@ def register_video():
         # Build transaction
         nonce = w3.eth.get_transaction_count(ACCOUNT_ADDRESS)
         
-        tx = contract.functions.registerMedia(video_info['hash'], description).build_transaction({
+        tx = registry.register_call(video_info['hash'], description).build_transaction({
             "chainId": 1337,
             "from": ACCOUNT_ADDRESS,
             "nonce": nonce,
@@ -348,6 +629,7 @@ def register_video():
         signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        refresh_chain_index()
         
         flash(f'✅ Video registered on blockchain! Transaction: {tx_hash.hex()[:20]}...', 'success')
         
@@ -394,13 +676,7 @@ def admin_register():
         return redirect(url_for('admin_panel'))
     
     # Save the file
-    filename = file.filename
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'admin_' + filename)
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    file.save(filepath)
-    
-    # Generate hash
-    video_hash = compute_file_sha256(filepath)
+    video_hash, _ = media_store.add_upload(file)
     
     # Register on blockchain
     PRIVATE_KEY = os.getenv("PRIVATE_KEY")
@@ -412,7 +688,7 @@ def admin_register():
     
     try:
         # Check if already registered
-        exists, _, _, _ = contract.functions.verifyMedia(video_hash).call()
+        exists, _, _, _ = registry.verify(video_hash)
         if exists:
             flash('Video already registered on blockchain', 'info')
             return redirect(url_for('admin_panel'))
@@ -420,7 +696,7 @@ def admin_register():
         # Register on blockchain
         nonce = w3.eth.get_transaction_count(ACCOUNT_ADDRESS)
         
-        tx = contract.functions.registerMedia(video_hash, description).build_transaction({
+        tx = registry.register_call(video_hash, description).build_transaction({
             "chainId": 1337,
             "from": ACCOUNT_ADDRESS,
             "nonce": nonce,
@@ -431,16 +707,15 @@ def admin_register():
         signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
         tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        refresh_chain_index()
         
         flash(f'✅ Video registered successfully! Transaction: {tx_hash.hex()[:20]}...', 'success')
         
     except Exception as e:
         flash(f'Registration failed: {str(e)}', 'error')
     
-    # Clean up
-    if os.path.exists(filepath):
-        os.remove(filepath)
-    
+    # The stored object is shared by every upload with this hash (queued
+    # jobs): leave it to the media store's quota eviction
     return redirect(url_for('admin_panel'))
 
 # @app.route('/admin_panel')
@@ -581,4 +856,9 @@ if __name__ == '__main__':
     if not os.path.exists(reports_folder):
         os.makedirs(reports_folder)
     
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    debug = True
+    # the debug reloader runs this block in a watcher process too; only the
+    # child it restarts (WERKZEUG_RUN_MAIN=true) serves requests
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        init_app()
+    app.run(debug=debug, port=5000)
\ No newline at end of file
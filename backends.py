@@ -0,0 +1,219 @@
+# backends.py
+# Inference engines behind detect.load_model(). Every backend is a callable
+# taking a float32 [N,3,H,W] tensor and returning [N,1] logits as a torch
+# tensor, so predict_video runs unchanged whichever engine is selected.
+#
+#   python backends.py export torchscript     # writes TORCHSCRIPT_PATH
+#   python backends.py export onnx            # writes ONNX_PATH
+#   python backends.py parity onnx            # compare against eager on the bundled clips
+# (the onnx backend and export need requirements-optional.txt)
+#
+# Precision / memory-layout modes (apply to the eager and compile backends):
+#   fp32          unchanged
+#   int8-dynamic  dynamic int8 quantization of Linear layers (EfficientNet only
+#                 has the classifier head, so this is mostly a baseline)
+#   int8-static   FX graph-mode static int8 of the whole network, calibrated on
+#                 sampled frames from the bundled clips
+#   bf16          bfloat16 autocast (needs AVX512-BF16/AMX to be faster than fp32)
+# plus an independent channels_last (NHWC) layout switch.
+import argparse
+import os
+
+import torch
+
+BACKENDS = ("eager", "torchscript", "compile", "onnx")
+PRECISIONS = ("fp32", "int8-dynamic", "int8-static", "bf16")
+
+class PrecisionBackend:
+    """Runs a module under bf16 autocast and/or with channels_last inputs."""
+    def __init__(self, module, bf16=False, channels_last=False):
+        self.module = module
+        self.bf16 = bf16
+        self.channels_last = channels_last
+
+    def __call__(self, x):
+        if self.channels_last:
+            x = x.contiguous(memory_format=torch.channels_last)
+        if self.bf16:
+            with torch.autocast("cpu", dtype=torch.bfloat16):
+                return self.module(x).float()
+        return self.module(x)
+
+def quantize_dynamic_int8(module):
+    """Dynamic int8 quantization: Linear weights in int8, activations quantized on the fly."""
+    return torch.ao.quantization.quantize_dynamic(module.cpu(), {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantize_static_int8(module, calibration_batches, image_size=224):
+    """
+    FX graph-mode static int8 quantization (x86 fbgemm/onednn config).
+    Observers are calibrated by running `calibration_batches` through the
+    prepared model, so they should be real preprocessed frames.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    module = module.cpu().eval()
+    example = torch.randn(1, 3, image_size, image_size)
+    prepared = prepare_fx(module, get_default_qconfig_mapping("x86"), example_inputs=(example,))
+    calibrated = 0
+    with torch.no_grad():
+        for x in calibration_batches:
+            prepared(x)
+            calibrated += len(x)
+    if calibrated == 0:
+        raise RuntimeError("int8-static needs calibration frames, none were found")
+    return convert_fx(prepared)
+
+def apply_precision(module, precision="fp32", channels_last=False, calibration_batches=None):
+    """Return a model callable for the eager `module` in the requested precision/layout."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (choose from {', '.join(PRECISIONS)})")
+    if precision == "int8-dynamic":
+        module = quantize_dynamic_int8(module)
+    elif precision == "int8-static":
+        module = quantize_static_int8(module, calibration_batches or [])
+    if channels_last:
+        module = module.to(memory_format=torch.channels_last)
+    if precision == "bf16" or channels_last:
+        return PrecisionBackend(module, bf16=(precision == "bf16"), channels_last=channels_last)
+    return module
+
+class TorchScriptBackend:
+    """Frozen, traced TorchScript module exported by export_torchscript()."""
+    name = "torchscript"
+
+    def __init__(self, path, device="cpu"):
+        module = torch.jit.load(path, map_location=device)
+        self.module = torch.jit.optimize_for_inference(module)
+
+    def __call__(self, x):
+        return self.module(x)
+
+class CompiledBackend:
+    """torch.compile() of the eager module (compiled lazily on the first batch)."""
+    name = "compile"
+
+    def __init__(self, module):
+        # dynamic=True: the last batch of a video is usually smaller, don't recompile for it
+        self.module = torch.compile(module, dynamic=True)
+
+    def __call__(self, x):
+        return self.module(x)
+
+class OnnxBackend:
+    """ONNX model exported by export_onnx(), run by ONNX Runtime's CPU provider."""
+    name = "onnx"
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort   # optional dependency, see requirements-optional.txt
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        logits = self.session.run(None, {self.input_name: x.detach().cpu().numpy()})[0]
+        return torch.from_numpy(logits)
+
+def load_backend(name, module=None, device="cpu", torchscript_path=None, onnx_path=None,
+                 precision="fp32", channels_last=False, calibration_batches=None):
+    """
+    Build the named backend. `module` is the eager model (needed by "eager"
+    and "compile"); the exported backends load their artifact from disk and
+    only run in fp32.
+    """
+    if name in ("eager", "compile"):
+        model = apply_precision(module, precision, channels_last, calibration_batches)
+        return CompiledBackend(model) if name == "compile" else model
+    if precision != "fp32" or channels_last:
+        raise ValueError(f"precision/channels_last modes are only supported by the eager "
+                         f"and compile backends, not {name}")
+    if name == "torchscript":
+        _require_artifact(torchscript_path, "torchscript")
+        return TorchScriptBackend(torchscript_path, device=device)
+    if name == "onnx":
+        _require_artifact(onnx_path, "onnx")
+        return OnnxBackend(onnx_path)
+    raise ValueError(f"Unknown inference backend: {name} (choose from {', '.join(BACKENDS)})")
+
+def _require_artifact(path, name):
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"{name} model not found at {path}. "
+                                f"Run: python backends.py export {name}")
+
+def export_torchscript(module, path, image_size=224):
+    """Trace + freeze the eager model and save it as TorchScript."""
+    module = module.cpu().eval()
+    example = torch.randn(1, 3, image_size, image_size)
+    with torch.no_grad():
+        traced = torch.jit.trace(module, example)
+        frozen = torch.jit.freeze(traced)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.jit.save(frozen, path)
+    return path
+
+def export_onnx(module, path, image_size=224, opset=17):
+    """Export the eager model to ONNX with a dynamic batch dimension."""
+    module = module.cpu().eval()
+    example = torch.randn(2, 3, image_size, image_size)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(module, (example,), path,
+                          input_names=["input"], output_names=["logits"],
+                          dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+                          opset_version=opset)
+    return path
+
+def parity(reference, backend, batches):
+    """Max absolute difference of fake probabilities between two engines over `batches`."""
+    worst = 0.0
+    with torch.no_grad():
+        for x in batches:
+            expected = torch.sigmoid(reference(x))
+            actual = torch.sigmoid(backend(x))
+            worst = max(worst, float((expected - actual).abs().max()))
+    return worst
+
+def main(argv=None):
+    # imported here: detect imports this module at load time
+    import detect
+    from benchmark import BUNDLED_VIDEOS, bundled_videos
+
+    parser = argparse.ArgumentParser(description="Export and check inference backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="write the artifact for an exported backend")
+    p.add_argument("backend", choices=["torchscript", "onnx"])
+    p.add_argument("--out", help="output path (default: configured path in detect.py)")
+
+    p = sub.add_parser("parity", help="compare a backend's outputs against eager PyTorch")
+    p.add_argument("backend", choices=BACKENDS)
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--tolerance", type=float, default=1e-4,
+                   help="max allowed |Δ probability| (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    eager = detect.load_model(device="cpu", backend="eager", precision="fp32", channels_last=False)
+    if args.command == "export":
+        if args.backend == "torchscript":
+            path = export_torchscript(eager, args.out or detect.TORCHSCRIPT_PATH, detect.IMAGE_SIZE)
+        else:
+            path = export_onnx(eager, args.out or detect.ONNX_PATH, detect.IMAGE_SIZE)
+        print(f"✅ Exported {args.backend} model: {path}")
+        return
+
+    backend = detect.load_model(device="cpu", backend=args.backend)
+    batches = []
+    for path in bundled_videos(args.videos or BUNDLED_VIDEOS):
+        batches.extend(detect.iter_video_batches(path, device="cpu"))
+    diff = parity(eager, backend, batches)
+    frames = sum(len(x) for x in batches)
+    ok = diff <= args.tolerance
+    print(f"{'✅' if ok else '❌'} {args.backend} vs eager over {frames} frames: max |Δp| = {diff:.2e}")
+    if not ok:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
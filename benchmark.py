@@ -0,0 +1,543 @@
+# benchmark.py
+# Micro-benchmarks for the detection pipeline, run against the bundled clips.
+#
+#   python benchmark.py decode                # frame sampling / decode cost
+#   python benchmark.py batch                 # frames/sec per inference batch size
+#   python benchmark.py preprocess            # per-frame preprocessing latency
+#   python benchmark.py pipeline              # serial vs pipelined decode/inference
+#   python benchmark.py precision             # fp32 vs int8 / bf16 / channels_last
+#   python benchmark.py pool                  # worker pool size x threads per worker
+#   python benchmark.py startup               # cold (torchvision) vs warm (artifact) model load
+#   python benchmark.py hashing               # SHA-256 throughput: old helpers vs hashing.py
+#
+#   python benchmark.py suite                 # end-to-end suite; compares against
+#                                             # bench_baseline.json and fails on regressions
+#   python benchmark.py suite --write-baseline
+import argparse
+import glob
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from detect import (BATCH_SIZE, FRAME_SAMPLE_RATE, PRECISIONS, THRESHOLD, FrameBatch, load_model,
+                    keyframe_indices, model_identity, predict_video, preprocess, read_sampled_frames)
+from hashing import HASH_WORKERS, HashCache, hash_files, sha256_file, sha256_file_mmap
+from utils import compute_file_sha256
+
+BUNDLED_VIDEOS = ["sample_video.mp4", "fake videos/*.mp4", "real videos/*.mp4"]
+
+def bundled_videos(patterns=BUNDLED_VIDEOS):
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+def _decode_read_all(path, sample_rate):
+    """Old predict_video loop: cap.read() on every frame, keep every Nth."""
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    kept = 0
+    for i in range(total):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if i % sample_rate != 0:
+            continue
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        kept += 1
+    cap.release()
+    return kept
+
+def _decode_sampled(path, sample_rate, mode):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    keyframes = keyframe_indices(path) if mode == "auto" else None
+    kept = 0
+    for _, frame in read_sampled_frames(cap, range(0, total, sample_rate), mode=mode, keyframes=keyframes):
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        kept += 1
+    cap.release()
+    return kept
+
+def _best_of(fn, repeat):
+    best = None
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out
+
+def bench_decode(args):
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    modes = ["read_all", "grab", "seek", "auto"]
+    totals = dict.fromkeys(modes, 0.0)
+
+    print(f"Decode benchmark: sample_rate={args.sample_rate}, best of {args.repeat}")
+    print(f"{'video':<28}" + "".join(f"{m:>11}" for m in modes) + f"{'frames':>8}")
+    for path in videos:
+        row = {}
+        frames = None
+        for mode in modes:
+            if mode == "read_all":
+                fn = lambda: _decode_read_all(path, args.sample_rate)
+            else:
+                fn = lambda: _decode_sampled(path, args.sample_rate, mode)
+            row[mode], kept = _best_of(fn, args.repeat)
+            totals[mode] += row[mode]
+            if frames is not None and kept != frames:
+                print(f"⚠️ {path}: {mode} scored {kept} frames, expected {frames}")
+            frames = kept
+        name = os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path)
+        print(f"{name[-28:]:<28}" + "".join(f"{row[m] * 1000:>9.1f}ms" for m in modes) + f"{frames:>8}")
+
+    print("-" * (28 + 11 * len(modes) + 8))
+    print(f"{'total':<28}" + "".join(f"{totals[m] * 1000:>9.1f}ms" for m in modes))
+    for mode in modes[1:]:
+        if totals[mode] > 0:
+            print(f"{mode}: {totals['read_all'] / totals[mode]:.2f}x faster than read_all")
+
+def bench_batch(args):
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    model = load_model()
+    # warm-up so one-off allocator/thread-pool setup isn't billed to batch size 1
+    predict_video(videos[0], model, sample_rate=args.sample_rate, batch_size=max(args.batch_sizes))
+
+    reference = None
+    print(f"Batch benchmark: {len(videos)} videos, sample_rate={args.sample_rate}")
+    print(f"{'batch':>6}{'frames':>8}{'seconds':>10}{'frames/s':>10}{'speedup':>9}{'max |Δp|':>11}")
+    for batch_size in args.batch_sizes:
+        frames = 0
+        probs = []
+        start = time.perf_counter()
+        for path in videos:
+            res = predict_video(path, model, sample_rate=args.sample_rate, batch_size=batch_size)
+            frames += res["frame_count"]
+            probs.append(res["avg_fake_probability"])
+        elapsed = time.perf_counter() - start
+        fps = frames / elapsed
+        if reference is None:
+            reference = (fps, probs)
+        diff = max(abs(a - b) for a, b in zip(probs, reference[1]))
+        print(f"{batch_size:>6}{frames:>8}{elapsed:>10.2f}{fps:>10.1f}{fps / reference[0]:>8.2f}x{diff:>11.2e}")
+
+def _sampled_frames(videos, sample_rate, limit):
+    frames = []
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for _, frame in read_sampled_frames(cap, range(0, total, sample_rate)):
+            frames.append(frame)
+        cap.release()
+        if len(frames) >= limit:
+            break
+    return frames[:limit]
+
+def bench_preprocess(args):
+    frames = _sampled_frames(bundled_videos(args.videos or BUNDLED_VIDEOS), args.sample_rate, args.frames)
+    batch = FrameBatch(batch_size=1, device="cpu")
+
+    def torchvision_chain(frame):
+        return preprocess(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def frame_batch(frame):
+        batch.clear()
+        batch.add(frame)
+        return batch.tensor[0]
+
+    print(f"Preprocess benchmark: {len(frames)} frames ({frames[0].shape[1]}x{frames[0].shape[0]} first)")
+    print(f"{'path':<18}{'mean':>10}{'p50':>10}{'p95':>10}")
+    results = {}
+    for name, fn in [("torchvision/PIL", torchvision_chain), ("FrameBatch", frame_batch)]:
+        for frame in frames[:5]:
+            fn(frame)  # warm-up
+        times = []
+        for frame in frames:
+            start = time.perf_counter()
+            fn(frame)
+            times.append(time.perf_counter() - start)
+        t = np.array(times) * 1e6
+        results[name] = t.mean()
+        print(f"{name:<18}{t.mean():>8.0f}µs{np.percentile(t, 50):>8.0f}µs{np.percentile(t, 95):>8.0f}µs")
+    print(f"speedup: {results['torchvision/PIL'] / results['FrameBatch']:.2f}x")
+
+    diffs = [(torchvision_chain(f) - frame_batch(f)).abs() for f in frames]
+    print(f"max |Δ| per pixel: {max(float(d.max()) for d in diffs):.4f}, "
+          f"mean |Δ|: {float(torch.stack([d.mean() for d in diffs]).mean()):.5f}")
+
+def bench_pipeline(args):
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    model = load_model()
+    predict_video(videos[0], model, sample_rate=args.sample_rate, batch_size=args.batch_size)  # warm-up
+
+    print(f"Pipeline benchmark: sample_rate={args.sample_rate}, batch_size={args.batch_size}")
+    print(f"{'video':<28}{'serial':>10}{'pipelined':>11}{'decode':>9}{'prep':>8}{'forward':>9}{'wait':>8}")
+    totals = [0.0, 0.0]
+    for path in videos:
+        start = time.perf_counter()
+        predict_video(path, model, sample_rate=args.sample_rate, batch_size=args.batch_size)
+        serial = time.perf_counter() - start
+        res = predict_video(path, model, sample_rate=args.sample_rate, batch_size=args.batch_size,
+                            pipelined=True)
+        t = res["timings"]
+        totals[0] += serial
+        totals[1] += t["total"]
+        name = os.path.basename(os.path.dirname(path)) + "/" + os.path.basename(path)
+        print(f"{name[-28:]:<28}{serial:>9.2f}s{t['total']:>10.2f}s{t.get('decode', 0):>8.2f}s"
+              f"{t.get('preprocess', 0) + t.get('color', 0):>7.2f}s{t.get('forward', 0):>8.2f}s{t.get('wait', 0):>7.2f}s")
+    print(f"total: serial {totals[0]:.2f}s, pipelined {totals[1]:.2f}s "
+          f"({totals[0] / totals[1]:.2f}x)")
+
+PRECISION_MODES = [("fp32", False), ("fp32", True), ("int8-dynamic", False),
+                   ("int8-static", False), ("bf16", False), ("bf16", True)]
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is KiB on Linux
+
+def _precision_worker(args):
+    """One mode per process, so ru_maxrss is that mode's peak only. Prints a JSON line."""
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    model = load_model(precision=args.precision, channels_last=args.channels_last)
+    predict_video(videos[0], model, sample_rate=args.sample_rate, batch_size=args.batch_size)  # warm-up
+    frames = 0
+    probs = {}
+    start = time.perf_counter()
+    for path in videos:
+        res = predict_video(path, model, sample_rate=args.sample_rate, batch_size=args.batch_size)
+        frames += res["frame_count"]
+        probs[path] = res["avg_fake_probability"]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"frames": frames, "seconds": elapsed, "peak_rss_mb": _peak_rss_mb(),
+                      "probs": probs}))
+
+def bench_precision(args):
+    if args.worker:
+        return _precision_worker(args)
+
+    print(f"Precision benchmark: sample_rate={args.sample_rate}, batch_size={args.batch_size}")
+    print(f"{'mode':<26}{'frames/s':>10}{'peak RSS':>11}{'mean |Δp|':>11}{'max |Δp|':>10}{'flips':>7}")
+    reference = None
+    for precision, channels_last in PRECISION_MODES:
+        cmd = [sys.executable, os.path.abspath(__file__), "precision", "--worker",
+               "--precision", precision, "--sample-rate", str(args.sample_rate),
+               "--batch-size", str(args.batch_size)] + (["--channels-last"] if channels_last else []) + args.videos
+        name = precision + (" + channels_last" if channels_last else "")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<26}  ❌ failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr else proc.returncode}")
+            continue
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        if reference is None:
+            reference = res["probs"]   # first mode is plain fp32
+        deltas = [abs(res["probs"][p] - reference[p]) for p in reference]
+        flips = sum((res["probs"][p] > THRESHOLD) != (reference[p] > THRESHOLD) for p in reference)
+        print(f"{name:<26}{res['frames'] / res['seconds']:>10.1f}{res['peak_rss_mb']:>8.0f} MB"
+              f"{sum(deltas) / len(deltas):>11.2e}{max(deltas):>10.2e}{flips:>7}")
+
+def bench_pool(args):
+    from inference_pool import InferencePool
+
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    jobs = videos * args.rounds
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"Pool benchmark: {len(jobs)} concurrent videos, {cpus} CPUs, batch_size={args.batch_size}")
+    print(f"{'workers':>8}{'threads':>8}{'cores':>7}{'seconds':>9}{'videos/s':>10}{'frames/s':>10}")
+    for workers in args.workers:
+        for threads in args.threads:
+            if workers * threads > cpus and not args.oversubscribe:
+                continue
+            pool = InferencePool(workers=workers, threads_per_worker=threads)
+            try:
+                pool.warm_up()
+                start = time.perf_counter()
+                futures = [pool.submit(path, batch_size=args.batch_size) for path in jobs]
+                frames = sum(f.result()["frame_count"] for f in futures)
+                elapsed = time.perf_counter() - start
+            finally:
+                pool.shutdown()
+            print(f"{workers:>8}{threads:>8}{workers * threads:>7}{elapsed:>9.2f}"
+                  f"{len(jobs) / elapsed:>10.2f}{frames / elapsed:>10.1f}")
+
+_STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+import detect
+model = detect.build_model("cpu", use_artifact={use_artifact})
+print(time.perf_counter() - start)
+"""
+
+def bench_startup(args):
+    from detect import MODEL_ARTIFACT_PATH, build_model_artifact
+
+    if not os.path.exists(MODEL_ARTIFACT_PATH):
+        print("Building model artifact:", build_model_artifact())
+    print(f"Startup benchmark: fresh interpreter per load, {args.repeat} runs each "
+          f"(includes importing torch/detect)")
+    medians = {}
+    for name, use_artifact in [("cold (torchvision)", False), ("warm (artifact)", True)]:
+        times = []
+        for _ in range(args.repeat):
+            proc = subprocess.run([sys.executable, "-c", _STARTUP_SNIPPET.format(use_artifact=use_artifact)],
+                                  capture_output=True, text=True, check=True)
+            times.append(float(proc.stdout.strip().splitlines()[-1]))
+        medians[name] = float(np.median(times))
+        print(f"{name:<20} median {medians[name]:.3f}s  min {min(times):.3f}s  max {max(times):.3f}s")
+    print(f"speedup: {medians['cold (torchvision)'] / medians['warm (artifact)']:.2f}x")
+
+def _legacy_sha256(path, chunk_size):
+    """The read()-per-chunk loop utils.py used before hashing.py (4 KiB / 1 MiB chunks)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _in_order(digests, paths):
+    return [digests[p] for p in paths]
+
+def bench_hashing(args):
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS) * args.copies
+    total_mb = sum(os.path.getsize(p) for p in videos) / 2**20
+    cache = HashCache(os.path.join(tempfile.mkdtemp(), "hashes.sqlite3"))
+    hash_files(videos, workers=args.workers, cache=cache)   # fill the cache for the warm run
+    methods = [
+        ("read 4 KiB (file_sha256)", lambda: [_legacy_sha256(p, 4096) for p in videos]),
+        ("read 1 MiB (compute_file_sha256)", lambda: [_legacy_sha256(p, 2**20) for p in videos]),
+        ("readinto 1 MiB (sha256_file)", lambda: [sha256_file(p) for p in videos]),
+        ("mmap", lambda: [sha256_file_mmap(p) for p in videos]),
+        (f"hash_files, {args.workers} threads", lambda: _in_order(hash_files(videos, args.workers, cache=False), videos)),
+        ("hash_files, warm cache", lambda: _in_order(hash_files(videos, args.workers, cache=cache), videos)),
+    ]
+
+    print(f"SHA-256 benchmark: {len(videos)} files, {total_mb:.1f} MiB, best of {args.repeat} (page cache warm)")
+    expected = None
+    baseline = None
+    for name, fn in methods:
+        seconds, digests = _best_of(fn, args.repeat)
+        if expected is None:
+            expected = digests
+            baseline = seconds
+        elif digests != expected:
+            print(f"❌ {name}: digests differ from the reference")
+        print(f"{name:<34}{total_mb / seconds:>10.0f} MiB/s{baseline / seconds:>8.2f}x")
+
+BASELINE_PATH = "bench_baseline.json"
+REGRESSION_TOLERANCE = 0.15     # fail when a metric's p50 is this much worse than the baseline
+
+def _summary(samples, unit, higher_is_better=False):
+    a = np.array(samples, dtype=float)
+    return {"p50": float(np.percentile(a, 50)), "p95": float(np.percentile(a, 95)),
+            "mean": float(a.mean()), "n": len(a), "unit": unit,
+            "higher_is_better": higher_is_better}
+
+def _suite_decode_fps(videos):
+    samples = []
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        frames = 0
+        start = time.perf_counter()
+        while cap.grab():
+            cap.retrieve()
+            frames += 1
+        elapsed = time.perf_counter() - start
+        cap.release()
+        if frames:
+            samples.append(frames / elapsed)
+    return _summary(samples, "frames/s", higher_is_better=True)
+
+def _suite_preprocess_ms(videos, sample_rate, limit=300):
+    batch = FrameBatch(batch_size=1, device="cpu")
+    samples = []
+    for frame in _sampled_frames(videos, sample_rate, limit):
+        batch.clear()
+        start = time.perf_counter()
+        batch.add(frame)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples, "ms/frame")
+
+def _suite_forward_ms(model, batch_size, repeat):
+    x = torch.randn(batch_size, 3, 224, 224)
+    samples = []
+    with torch.no_grad():
+        model(x)    # warm-up
+        for _ in range(repeat):
+            start = time.perf_counter()
+            model(x)
+            samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples, f"ms/batch of {batch_size}")
+
+def _suite_sha256_mbps(videos, repeat):
+    samples = []
+    for path in videos:
+        size_mb = os.path.getsize(path) / 2**20
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute_file_sha256(path)
+            samples.append(size_mb / (time.perf_counter() - start))
+    return _summary(samples, "MiB/s", higher_is_better=True)
+
+def _suite_predict_s(model, videos, sample_rate, batch_size):
+    samples = []
+    for path in videos:
+        start = time.perf_counter()
+        predict_video(path, model, sample_rate=sample_rate, batch_size=batch_size)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples, "s/video")
+
+def run_suite(videos, sample_rate=FRAME_SAMPLE_RATE, batch_size=BATCH_SIZE, repeat=5):
+    """Measure every stage separately plus full predict_video latency; returns the report dict."""
+    torch.manual_seed(0)
+    model = load_model()
+    predict_video(videos[0], model, sample_rate=sample_rate, batch_size=batch_size)  # warm-up
+    metrics = {
+        "decode_fps": _suite_decode_fps(videos),
+        "preprocess_ms": _suite_preprocess_ms(videos, sample_rate),
+        "forward_ms": _suite_forward_ms(model, batch_size, repeat * 4),
+        "sha256_mbps": _suite_sha256_mbps(videos, repeat),
+        "predict_video_s": _suite_predict_s(model, videos, sample_rate, batch_size),
+    }
+    metrics["peak_rss_mb"] = _summary([_peak_rss_mb()], "MiB")
+    return {
+        "meta": {
+            "videos": videos,
+            "sample_rate": sample_rate,
+            "batch_size": batch_size,
+            "model": model_identity(),
+            "torch": torch.__version__,
+            "torch_threads": torch.get_num_threads(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "metrics": metrics,
+    }
+
+def compare_to_baseline(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """List of (metric, baseline p50, current p50, relative change, regressed?)."""
+    rows = []
+    for name, current in report["metrics"].items():
+        base = baseline.get("metrics", {}).get(name)
+        if not base or not base["p50"]:
+            continue
+        change = (current["p50"] - base["p50"]) / base["p50"]
+        worse = -change if current["higher_is_better"] else change
+        rows.append((name, base["p50"], current["p50"], change, worse > tolerance))
+    return rows
+
+def bench_suite(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    videos = bundled_videos(args.videos or BUNDLED_VIDEOS)
+    report = run_suite(videos, args.sample_rate, args.batch_size, args.repeat)
+
+    print(f"Benchmark suite: {len(videos)} videos, {report['meta']['torch_threads']} torch threads")
+    print(f"{'metric':<18}{'p50':>12}{'p95':>12}  unit")
+    for name, m in report["metrics"].items():
+        print(f"{name:<18}{m['p50']:>12.3f}{m['p95']:>12.3f}  {m['unit']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.write_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline written: {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare_to_baseline(report, baseline, args.tolerance)
+    print(f"\nAgainst {args.baseline} ({baseline['meta'].get('created', '?')}), tolerance {args.tolerance:.0%}:")
+    for name, base, current, change, regressed in rows:
+        print(f"{'❌' if regressed else '✅'} {name:<18}{base:>12.3f} -> {current:<12.3f}{change:+.1%}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"❌ Regression in: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detection pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("decode", help="compare frame sampling strategies (decode only)")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_decode)
+
+    p = sub.add_parser("batch", help="compare inference throughput across batch sizes")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("preprocess", help="compare torchvision/PIL vs in-place FrameBatch preprocessing")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--frames", type=int, default=200, help="number of frames to time")
+    p.set_defaults(func=bench_preprocess)
+
+    p = sub.add_parser("pipeline", help="compare serial vs pipelined predict_video latency")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser("precision", help="throughput, peak RSS and accuracy drift per precision mode")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--precision", choices=PRECISIONS, default="fp32", help=argparse.SUPPRESS)
+    p.add_argument("--channels-last", action="store_true", help=argparse.SUPPRESS)
+    p.set_defaults(func=bench_precision)
+
+    p = sub.add_parser("pool", help="throughput matrix of pool size x threads per worker")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--rounds", type=int, default=1, help="submit every video this many times")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--oversubscribe", action="store_true",
+                   help="also run combinations using more threads than CPUs")
+    p.set_defaults(func=bench_pool)
+
+    p = sub.add_parser("startup", help="compare model load time from torchvision vs the local artifact")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("hashing", help="SHA-256 throughput of the old helpers vs hashing.py")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--workers", type=int, default=HASH_WORKERS, help="threads for hash_files")
+    p.add_argument("--copies", type=int, default=1, help="hash every file this many times per run")
+    p.set_defaults(func=bench_hashing)
+
+    p = sub.add_parser("suite", help="end-to-end suite with p50/p95, JSON baseline and regression check")
+    p.add_argument("videos", nargs="*", help="video files or globs (default: bundled clips)")
+    p.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE)
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--repeat", type=int, default=5, help="repetitions for hashing/forward samples")
+    p.add_argument("--threads", type=int, default=0, help="torch threads (default: torch's choice)")
+    p.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON (default: %(default)s)")
+    p.add_argument("--write-baseline", action="store_true",
+                   help="store this run as the new baseline instead of comparing")
+    p.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                   help="allowed relative p50 regression (default: %(default)s)")
+    p.add_argument("--output", help="also write this run's report to a JSON file")
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# chain_index.py
+# Local index of MediaRegistry registrations, built from the contract's
+# MediaRegistered events: backfilled from CHAIN_INDEX_START_BLOCK, then
+# tailed every CHAIN_INDEX_POLL seconds. Registrations are kept in SQLite
+# (survives restarts, resumes from the last processed block) and mirrored
+# in a dict, so verification is a dict lookup instead of a verifyMedia RPC.
+#
+# Reorgs: the hash of the last processed block (and of every block that had
+# events) is remembered. If the chain no longer has one of them, the index
+# rolls back to the newest remembered block still on the chain and rescans.
+#
+#   python chain_index.py              # sync once against GANACHE_URL and print stats
+#   python chain_index.py --follow     # keep tailing
+#   python chain_index.py --selftest   # deploy v1 and v2 on eth-tester, register, reorg, check the index
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+from registry_client import RegistryClient, compile_registry, load_registry
+
+CHAIN_INDEX_PATH = os.getenv("CHAIN_INDEX_PATH", "cache/chain_index.sqlite3")
+CHAIN_INDEX_START_BLOCK = int(os.getenv("CHAIN_INDEX_START_BLOCK", "0"))  # contract deployment block
+CHAIN_INDEX_POLL = 2.0          # seconds between tail polls
+CHAIN_INDEX_MAX_LAG = 10.0      # seconds since the last successful sync before lookups fall back to RPC
+CHAIN_INDEX_BATCH = 2000        # blocks per eth_getLogs request
+CHAIN_INDEX_REORG_DEPTH = 64    # remembered block hashes (deepest reorg that can be handled)
+
+class ChainIndex:
+    """MediaRegistered events of one contract, indexed by media hash."""
+
+    def __init__(self, w3, contract, path=CHAIN_INDEX_PATH, start_block=CHAIN_INDEX_START_BLOCK,
+                 max_lag=CHAIN_INDEX_MAX_LAG):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.w3 = w3
+        self.contract = contract
+        self.path = path
+        self.start_block = start_block
+        self.max_lag = max_lag
+        self.last_sync = 0.0        # time.time() of the last successful sync
+        self.reorgs = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # written by the sync thread only, read by request threads through _media
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS media (
+                hash TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                uploader TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                block_number INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS media_block ON media(block_number);
+            CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        if self._meta("contract") != contract.address:
+            # another deployment: nothing indexed so far applies to it
+            self._conn.executescript("DELETE FROM media; DELETE FROM blocks; DELETE FROM meta;")
+            self._set_meta("contract", contract.address)
+        self._media = {row[0]: tuple(row[1:]) for row in self._conn.execute(
+            "SELECT hash, description, uploader, timestamp FROM media")}
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def last_block(self):
+        value = self._meta("last_block")
+        return int(value) if value is not None else self.start_block - 1
+
+    @property
+    def fresh(self):
+        """True while the index is recent enough to answer misses without asking the node."""
+        return time.time() - self.last_sync <= self.max_lag
+
+    def lookup(self, media_hash):
+        """
+        verifyMedia-shaped (exists, description, uploader, timestamp) from the
+        index, or None if the index is stale and the node should be asked.
+        """
+        entry = self._media.get(media_hash)
+        if entry is not None:
+            return (True, *entry)
+        if not self.fresh:
+            return None
+        return (False, "", "0x0000000000000000000000000000000000000000", 0)
+
+    def sync(self):
+        """Roll back any reorged blocks, then index new events up to the chain head. Returns events added."""
+        with self._lock:
+            self._handle_reorg()
+            head = self.w3.eth.block_number
+            added = 0
+            start = self.last_block + 1
+            while start <= head:
+                end = min(start + CHAIN_INDEX_BATCH - 1, head)
+                logs = self.contract.events.MediaRegistered().get_logs(from_block=start, to_block=end)
+                end_hash = self.w3.eth.get_block(end)["hash"].hex()
+                self._conn.execute("BEGIN")
+                try:
+                    for log in logs:
+                        added += self._add(log)
+                    self._conn.execute("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+                                       (end, end_hash))
+                    self._conn.execute("DELETE FROM blocks WHERE number NOT IN "
+                                       "(SELECT number FROM blocks ORDER BY number DESC LIMIT ?)",
+                                       (CHAIN_INDEX_REORG_DEPTH,))
+                    self._set_meta("last_block", end)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    self._reload()
+                    raise
+                start = end + 1
+            self.last_sync = time.time()
+            return added
+
+    def _add(self, log):
+        args = log["args"]
+        media_hash = args["hash"]
+        if isinstance(media_hash, bytes):
+            media_hash = bytes(media_hash).hex()    # MediaRegistryV2 logs the bytes32 digest
+        cur = self._conn.execute(
+            "INSERT OR IGNORE INTO media (hash, description, uploader, timestamp, block_number, tx_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (media_hash, args["description"], args["uploader"], args["timestamp"],
+             log["blockNumber"], log["transactionHash"].hex()))
+        self._conn.execute("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+                           (log["blockNumber"], log["blockHash"].hex()))
+        if cur.rowcount:
+            self._media[media_hash] = (args["description"], args["uploader"], args["timestamp"])
+        return cur.rowcount
+
+    def _handle_reorg(self):
+        """Drop everything above the newest remembered block that is still on the chain."""
+        remembered = self._conn.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+        if not remembered:
+            return
+        head = self.w3.eth.block_number
+        safe = None
+        for number, block_hash in remembered:
+            if number <= head and self.w3.eth.get_block(number)["hash"].hex() == block_hash:
+                safe = number
+                break
+        if safe == remembered[0][0]:
+            return      # the last processed block is still canonical
+        if safe is None:
+            if len(remembered) >= CHAIN_INDEX_REORG_DEPTH:
+                print("⚠️ Chain index: reorg deeper than the remembered blocks, reindexing")
+            safe = self.start_block - 1
+        self._conn.execute("BEGIN")
+        self._conn.execute("DELETE FROM media WHERE block_number > ?", (safe,))
+        self._conn.execute("DELETE FROM blocks WHERE number > ?", (safe,))
+        self._set_meta("last_block", safe)
+        self._conn.execute("COMMIT")
+        self._reload()
+        self.reorgs += 1
+        print(f"⚠️ Chain index: reorg detected, rolled back to block {safe}")
+
+    def _reload(self):
+        self._media = {row[0]: tuple(row[1:]) for row in self._conn.execute(
+            "SELECT hash, description, uploader, timestamp FROM media")}
+
+    def start(self, interval=CHAIN_INDEX_POLL):
+        """Backfill and tail in a background thread."""
+        def run():
+            while not self._stop.is_set():
+                try:
+                    added = self.sync()
+                    if added:
+                        print(f"✅ Chain index: {added} new registration(s), {len(self._media)} indexed")
+                except Exception as e:
+                    print(f"⚠️ Chain index sync failed: {e}")
+                self._stop.wait(interval)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name="chain-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {
+            "contract": self.contract.address,
+            "indexed": len(self._media),
+            "last_block": self.last_block,
+            "fresh": self.fresh,
+            "seconds_since_sync": round(time.time() - self.last_sync, 3) if self.last_sync else None,
+            "reorgs": self.reorgs
+        }
+
+def selftest(name="MediaRegistry", abi=None, bytecode=None, path=None):
+    """
+    Check backfill, tail and reorg handling on an in-process eth-tester chain
+    against contract/<name>.sol (or the given abi/bytecode).
+    """
+    import tempfile
+
+    from web3 import EthereumTesterProvider, Web3
+
+    if abi is None:
+        abi, bytecode = compile_registry(name)
+    provider = EthereumTesterProvider()
+    tester = provider.ethereum_tester
+    w3 = Web3(provider)
+    account = w3.eth.accounts[0]
+    receipt = w3.eth.wait_for_transaction_receipt(
+        w3.eth.contract(abi=abi, bytecode=bytecode).constructor().transact({"from": account}))
+    contract = w3.eth.contract(address=receipt.contractAddress, abi=abi)
+    client = RegistryClient(w3, contract)
+
+    def register(media_hash, description):
+        tx = client.register_call(media_hash, description).transact({"from": account})
+        w3.eth.wait_for_transaction_receipt(tx)
+
+    register("a" * 64, "first")
+    register("b" * 64, "second")
+    path = path or os.path.join(tempfile.mkdtemp(), "chain_index.sqlite3")
+    index = ChainIndex(w3, contract, path=path, start_block=receipt.blockNumber)
+    assert index.sync() == 2, "backfill should index both registrations"
+    assert index.lookup("a" * 64)[:2] == (True, "first")
+    assert index.lookup("c" * 64)[0] is False
+
+    snapshot = tester.take_snapshot()
+    register("c" * 64, "orphaned")
+    assert index.sync() == 1 and index.lookup("c" * 64)[0], "tail should pick up new registrations"
+
+    # reorg: drop the block with "c" and build a different chain of the same height
+    tester.revert_to_snapshot(snapshot)
+    register("d" * 64, "canonical")
+    tester.mine_blocks(2)
+    index.sync()
+    assert index.reorgs == 1, "reorg should be detected"
+    assert not index.lookup("c" * 64)[0], "registration from the dropped block should be gone"
+    assert index.lookup("d" * 64)[:2] == (True, "canonical")
+
+    # restart: resumes from SQLite, agrees with the contract
+    reopened = ChainIndex(w3, contract, path=path, start_block=receipt.blockNumber)
+    assert reopened.sync() == 0
+    for media_hash in ("a" * 64, "b" * 64, "c" * 64, "d" * 64):
+        assert reopened.lookup(media_hash) == client.verify(media_hash), media_hash
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        reopened.lookup("a" * 64)
+    per_lookup = (time.perf_counter() - start) / 100000
+    start = time.perf_counter()
+    for _ in range(100):
+        client.verify("a" * 64)
+    per_call = (time.perf_counter() - start) / 100
+    print(f"✅ Chain index selftest passed on v{client.version}: index lookup {per_lookup * 1e6:.2f} µs, "
+          f"verifyMedia call {per_call * 1e3:.2f} ms (in-process chain, no network)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index MediaRegistered events into a local store")
+    parser.add_argument("--follow", action="store_true", help="keep tailing new blocks")
+    parser.add_argument("--selftest", action="store_true",
+                        help="run against an in-process eth-tester chain (needs eth-tester[py-evm] and solc)")
+    args = parser.parse_args(argv)
+
+    if args.selftest:
+        for name in ("MediaRegistry", "MediaRegistryV2"):
+            selftest(name)
+        return
+
+    from dotenv import load_dotenv
+    from web3 import Web3
+
+    load_dotenv()
+    w3 = Web3(Web3.HTTPProvider(os.getenv("GANACHE_URL")))
+    if not w3.is_connected():
+        raise SystemExit("❌ Cannot connect to GANACHE_URL")
+    index = ChainIndex(w3, load_registry(w3))
+    while True:
+        added = index.sync()
+        print(f"✅ {added} new registration(s)", index.stats())
+        if not args.follow:
+            break
+        time.sleep(CHAIN_INDEX_POLL)
+
+if __name__ == "__main__":
+    main()
@@ -33,4 +33,29 @@ contract MediaRegistry {
         Media memory m = mediaList[_hash];
         return (true, m.description, m.uploader, m.timestamp);
     }
+
+    // verifyMedia for many hashes in one eth_call; results are parallel arrays
+    // in the order of _hashes (unregistered entries are false/""/0x0/0). The arrays
+    // are the named returns, not locals copied out at the end, to stay clear of
+    // "stack too deep".
+    function verifyMediaBatch(string[] calldata _hashes) external view
+        returns (bool[] memory found, string[] memory descriptions, address[] memory uploaders,
+                 uint256[] memory timestamps)
+    {
+        found = new bool[](_hashes.length);
+        descriptions = new string[](_hashes.length);
+        uploaders = new address[](_hashes.length);
+        timestamps = new uint256[](_hashes.length);
+
+        for (uint256 i = 0; i < _hashes.length; i++) {
+            Media storage m = mediaList[_hashes[i]];
+            if (bytes(m.hash).length == 0) {
+                continue;
+            }
+            found[i] = true;
+            descriptions[i] = m.description;
+            uploaders[i] = m.uploader;
+            timestamps[i] = m.timestamp;
+        }
+    }
 }
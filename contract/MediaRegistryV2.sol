@@ -0,0 +1,100 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// MediaRegistry keyed by the 32-byte SHA-256 digest instead of its 64-character
+// hex string. The digest is only the mapping key (not stored again), and
+// uploader, timestamp and the existence flag share a single storage slot.
+contract MediaRegistryV2 {
+    struct Media {
+        address uploader;       // 20 bytes \
+        uint64 timestamp;       //  8 bytes  > one slot
+        bool exists;            //  1 byte  /
+        string description;
+    }
+
+    address public owner;
+    bool public migrationOpen = true;   // importMedia allowed; packed with owner
+
+    mapping(bytes32 => Media) public mediaList;
+
+    event MediaRegistered(bytes32 indexed hash, string description, address uploader, uint256 timestamp);
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only owner");
+        _;
+    }
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    function registerMedia(bytes32 _hash, string calldata _description) external {
+        require(!mediaList[_hash].exists, "Already registered");
+        _store(_hash, _description, msg.sender, uint64(block.timestamp));
+    }
+
+    // Replays v1 registrations (migrate_registry.py) with their original uploader
+    // and timestamp. Hashes already present are skipped, so a migration can resume.
+    function importMedia(
+        bytes32[] calldata _hashes,
+        string[] calldata _descriptions,
+        address[] calldata _uploaders,
+        uint64[] calldata _timestamps
+    ) external onlyOwner {
+        require(migrationOpen, "Migration closed");
+        require(
+            _descriptions.length == _hashes.length &&
+            _uploaders.length == _hashes.length &&
+            _timestamps.length == _hashes.length,
+            "Length mismatch"
+        );
+        for (uint256 i = 0; i < _hashes.length; i++) {
+            if (!mediaList[_hashes[i]].exists) {
+                _store(_hashes[i], _descriptions[i], _uploaders[i], _timestamps[i]);
+            }
+        }
+    }
+
+    function closeMigration() external onlyOwner {
+        migrationOpen = false;
+    }
+
+    function _store(bytes32 _hash, string calldata _description, address _uploader, uint64 _timestamp) private {
+        Media storage m = mediaList[_hash];
+        m.uploader = _uploader;
+        m.timestamp = _timestamp;
+        m.exists = true;
+        m.description = _description;
+        emit MediaRegistered(_hash, _description, _uploader, _timestamp);
+    }
+
+    function verifyMedia(bytes32 _hash) external view returns (bool, string memory, address, uint256) {
+        Media storage m = mediaList[_hash];
+        return (m.exists, m.description, m.uploader, m.timestamp);
+    }
+
+    // verifyMedia for many hashes in one eth_call; results are parallel arrays
+    // in the order of _hashes (unregistered entries are false/""/0x0/0). The arrays
+    // are the named returns, not locals copied out at the end, to stay clear of
+    // "stack too deep".
+    function verifyMediaBatch(bytes32[] calldata _hashes) external view
+        returns (bool[] memory found, string[] memory descriptions, address[] memory uploaders,
+                 uint256[] memory timestamps)
+    {
+        found = new bool[](_hashes.length);
+        descriptions = new string[](_hashes.length);
+        uploaders = new address[](_hashes.length);
+        timestamps = new uint256[](_hashes.length);
+
+        for (uint256 i = 0; i < _hashes.length; i++) {
+            Media storage m = mediaList[_hashes[i]];
+            if (!m.exists) {
+                continue;
+            }
+            found[i] = true;
+            descriptions[i] = m.description;
+            uploaders[i] = m.uploader;
+            timestamps[i] = m.timestamp;
+        }
+    }
+}
@@ -1,14 +1,12 @@
 from web3 import Web3
 import json
-from solcx import compile_standard, install_solc
+from registry_client import REGISTRY_JSON, RegistryClient, compile_registry
 from utils import file_sha256
 import sys, os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
-# Install Solidity compiler if not already
-install_solc("0.8.0")
 
 GANACHE_URL = os.getenv("GANACHE_URL")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
@@ -17,18 +15,9 @@ ACCOUNT_ADDRESS = os.getenv("ACCOUNT_ADDRESS")
 w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
 assert w3.is_connected(), "❌ Ganache not connected"
 
-with open("contract/MediaRegistry.sol", "r") as f:
-    source = f.read()
-
-compiled_sol = compile_standard({
-    "language": "Solidity",
-    "sources": {"MediaRegistry.sol": {"content": source}},
-    "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}}
-}, solc_version="0.8.0")
-
-# Extract ABI and bytecode
-abi = compiled_sol["contracts"]["MediaRegistry.sol"]["MediaRegistry"]["abi"]
-bytecode = compiled_sol["contracts"]["MediaRegistry.sol"]["MediaRegistry"]["evm"]["bytecode"]["object"]
+# New deployments use the bytes32-keyed v2 contract; existing v1 deployments
+# are moved over with migrate_registry.py
+abi, bytecode = compile_registry("MediaRegistryV2")
 
 MediaRegistry = w3.eth.contract(abi=abi, bytecode=bytecode)
 nonce = w3.eth.get_transaction_count(ACCOUNT_ADDRESS)
@@ -49,7 +38,7 @@ print(f"✅ Deployed contract address: {tx_receipt.contractAddress}")
 
 # Save ABI + address
 os.makedirs("contract", exist_ok=True)
-with open("contract/MediaRegistry.json", "w") as f:
+with open(REGISTRY_JSON, "w") as f:
     json.dump({
         "address": tx_receipt.contractAddress,
         "abi": abi
@@ -68,7 +57,7 @@ print("Video sha256:", video_hash)
 contract_instance = w3.eth.contract(address=tx_receipt.contractAddress, abi=abi)
 nonce = w3.eth.get_transaction_count(ACCOUNT_ADDRESS)
 
-tx = contract_instance.functions.registerMedia(video_hash, desc).build_transaction({
+tx = RegistryClient(w3, contract_instance).register_call(video_hash, desc).build_transaction({
     "chainId": 1337,
     "from": ACCOUNT_ADDRESS,
     "nonce": nonce,
@@ -6,77 +6,1001 @@ from torchvision import models
 import numpy as np
 from tqdm import tqdm
 import sys
+import argparse
+import queue
+import threading
+import time
+import math
+import bisect
+import os
+import glob
+import json
+import logging
+from collections import deque
+from contextlib import contextmanager
 from hashlib import sha256
-from utils import compute_file_sha256
+from hashing import hash_files
+from utils import compute_file_sha256, expand_inputs
+from backends import BACKENDS, PRECISIONS, load_backend
 
 # ---------- CONFIG ----------
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 MODEL_WEIGHTS_PATH = None   # optional path if you fine-tune and save a model
+MODEL_ARTIFACT_PATH = os.getenv("MODEL_ARTIFACT_PATH", "models/efficientnet_b0_deepfake.pt")  # see build_model_artifact
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager")  # "eager" | "torchscript" | "compile" | "onnx"
+TORCHSCRIPT_PATH = os.getenv("TORCHSCRIPT_PATH", "models/efficientnet_b0_deepfake.ts")
+ONNX_PATH = os.getenv("ONNX_PATH", "models/efficientnet_b0_deepfake.onnx")
+PRECISION = os.getenv("INFERENCE_PRECISION", "fp32")    # "fp32" | "int8-dynamic" | "int8-static" | "bf16"
+CHANNELS_LAST = os.getenv("CHANNELS_LAST", "0") == "1"  # NHWC memory layout for conv kernels
+CALIBRATION_VIDEOS = ["fake videos/*.mp4", "real videos/*.mp4"]  # int8-static calibration clips
+CALIBRATION_FRAMES = 8      # frames taken from each calibration clip
+FRAME_SAMPLING = "stride"   # "stride" (every FRAME_SAMPLE_RATE-th frame) | "uniform" | "stratified"
 FRAME_SAMPLE_RATE = 8       # sample 1 frame every N frames
+FRAME_BUDGET = 64           # frames scored per video by "uniform"/"stratified", whatever its length
+MAX_SAMPLED_FRAMES = 512    # hard cap on scored frames for every strategy (bounds worst-case latency)
+FRAME_SEEK_MODE = "grab"    # "grab" | "seek" | "auto" (see read_sampled_frames)
+SEEK_BACKOFF = 16           # OpenCV seeks to the keyframe before (target - this many frames), then decodes forward
 IMAGE_SIZE = 224
+BATCH_SIZE = 16             # sampled frames per forward pass
+PIPELINED = False           # decode/preprocess in a background thread while the model runs
+PIPELINE_QUEUE_DEPTH = 2    # preprocessed batches the decoder may get ahead of inference
 THRESHOLD = 0.5             # >0.5 => fake (adjust after validation)
+DEDUP_FRAMES = False        # reuse the prediction of a near-identical, already scored frame
+DEDUP_MAX_DISTANCE = 4      # max Hamming distance (of 64 bits) between frame dHashes to count as duplicate
+DEDUP_WINDOW = 32           # compare against this many most recently scored frames
+EARLY_STOP = False          # stop sampling once the verdict vs THRESHOLD is statistically settled
+EARLY_STOP_MIN_FRAMES = 16  # never stop before this many frames are inferred (reused ones don't count)
+EARLY_STOP_DELTA = 0.05     # tolerated chance that the early verdict differs from the mean of all sampled frames
+EARLY_STOP_CHECKS = 3       # verdict checks at most (after min_frames, then each doubling); delta is split over them
+NORM_MEAN = [0.485, 0.456, 0.406]   # ImageNet stats the backbone was trained with
+NORM_STD = [0.229, 0.224, 0.225]
+KEYFRAME_MAX_FRAMES = 128   # fast scan: keyframes scored at most (spread over the video if it has more)
 # ----------------------------
 
-def load_model(device=DEVICE):
+def _efficientnet_b0_binary(pretrained=True):
     # EfficientNet_b0 backbone as demo
-    model = models.efficientnet_b0(pretrained=True)
+    model = models.efficientnet_b0(pretrained=True) if pretrained else models.efficientnet_b0(weights=None)
     # replace classifier with binary head
     num_ftrs = model.classifier[1].in_features
     model.classifier = torch.nn.Sequential(
         torch.nn.Dropout(p=0.2),
         torch.nn.Linear(num_ftrs, 1)  # single logit for binary
     )
+    return model
+
+def build_model(device=DEVICE, use_artifact=True):
+    """
+    Eager EfficientNet-B0 with the binary head. Loaded offline from the
+    local MODEL_ARTIFACT_PATH file when it exists and matches the current
+    MODEL_WEIGHTS_PATH; otherwise built from torchvision's ImageNet weights.
+    """
+    if use_artifact and MODEL_ARTIFACT_PATH and os.path.exists(MODEL_ARTIFACT_PATH):
+        model = load_model_artifact(MODEL_ARTIFACT_PATH, device)
+        if model is not None:
+            return model
+    model = _efficientnet_b0_binary(pretrained=True)
     if MODEL_WEIGHTS_PATH:
         model.load_state_dict(torch.load(MODEL_WEIGHTS_PATH, map_location=device))
     model.to(device).eval()
     return model
 
+def build_model_artifact(path=MODEL_ARTIFACT_PATH):
+    """
+    One-time step: write the final model (backbone + binary head +
+    MODEL_WEIGHTS_PATH weights) to a single local file that
+    load_model_artifact() can memory-map without network access.
+    """
+    model = build_model("cpu", use_artifact=False)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.save({
+        "arch": "efficientnet_b0_binary",
+        "weights": _file_fingerprint(MODEL_WEIGHTS_PATH) if MODEL_WEIGHTS_PATH else "imagenet",
+        "state_dict": model.state_dict()
+    }, path)
+    return path
+
+def load_model_artifact(path=MODEL_ARTIFACT_PATH, device=DEVICE):
+    """
+    Model from a build_model_artifact() file. Tensors are memory-mapped and
+    assigned into a skeleton built on the meta device, so no ImageNet
+    download, no random init and no extra copy of the weights. Returns None
+    if the artifact was built from different MODEL_WEIGHTS_PATH weights.
+    """
+    ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    weights = _file_fingerprint(MODEL_WEIGHTS_PATH) if MODEL_WEIGHTS_PATH else "imagenet"
+    if ckpt.get("arch") != "efficientnet_b0_binary" or ckpt.get("weights") != weights:
+        print(f"⚠️ Model artifact {path} is stale (weights changed), rebuild it with: "
+              "python detect.py --build-artifact")
+        return None
+    with torch.device("meta"):
+        model = _efficientnet_b0_binary(pretrained=False)
+    model.load_state_dict(ckpt["state_dict"], assign=True)
+    model.to(device).eval()
+    return model
+
+def _file_fingerprint(path):
+    if not path or not os.path.exists(path):
+        return "none"
+    st = os.stat(path)
+    return f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}"
+
+def model_identity(backend=INFERENCE_BACKEND, precision=PRECISION, channels_last=CHANNELS_LAST):
+    """
+    String identifying the model a result was produced with (architecture,
+    weights file, backend, precision), for keying cached results.
+    """
+    weights = _file_fingerprint(MODEL_WEIGHTS_PATH) if MODEL_WEIGHTS_PATH else "imagenet"
+    parts = ["efficientnet_b0", "weights=" + weights, "backend=" + backend, "precision=" + precision]
+    if backend == "torchscript":
+        parts.append("artifact=" + _file_fingerprint(TORCHSCRIPT_PATH))
+    elif backend == "onnx":
+        parts.append("artifact=" + _file_fingerprint(ONNX_PATH))
+    if channels_last:
+        parts.append("channels_last")
+    return "|".join(parts)
+
+def calibration_batches(patterns=CALIBRATION_VIDEOS, frames_per_video=CALIBRATION_FRAMES):
+    """Preprocessed frames spread over each calibration clip, for int8-static observers."""
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            yield from iter_video_batches(path, device="cpu", sampling="uniform",
+                                          frame_budget=frames_per_video)
+
+def load_model(device=DEVICE, backend=INFERENCE_BACKEND, precision=PRECISION,
+               channels_last=CHANNELS_LAST):
+    """
+    Model callable for predict_video, run by the selected inference backend
+    (INFERENCE_BACKEND env var by default, see backends.py). "eager" returns
+    the plain torch module in fp32; "torchscript"/"onnx" load their exported
+    file. `precision`/`channels_last` pick a low-precision or NHWC variant of
+    the eager/compile model; int8 modes run on CPU only.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (choose from {', '.join(BACKENDS)})")
+    if precision.startswith("int8"):
+        device = "cpu"
+    module = build_model(device) if backend in ("eager", "compile") else None
+    calibration = calibration_batches() if precision == "int8-static" else None
+    return load_backend(backend, module, device=device,
+                        torchscript_path=TORCHSCRIPT_PATH, onnx_path=ONNX_PATH,
+                        precision=precision, channels_last=channels_last,
+                        calibration_batches=calibration)
+
+# Reference torchvision chain (numpy -> PIL -> tensor). predict_video uses
+# FrameBatch instead; this is kept for parity checks and benchmarks.
 preprocess = T.Compose([
     T.ToPILImage(),
     T.Resize((IMAGE_SIZE, IMAGE_SIZE)),
     T.ToTensor(),
-    T.Normalize(mean=[0.485,0.456,0.406], std=[0.229,0.224,0.225])
+    T.Normalize(mean=NORM_MEAN, std=NORM_STD)
 ])
 
-def predict_video(video_path, model, device=DEVICE, sample_rate=FRAME_SAMPLE_RATE):
+# (x / 255 - mean) / std  ==  x * scale - offset, per RGB channel, shaped for CHW
+_NORM_SCALE = (1.0 / (255.0 * np.array(NORM_STD, dtype=np.float32)))[:, None, None]
+_NORM_OFFSET = (np.array(NORM_MEAN, dtype=np.float32) / np.array(NORM_STD, dtype=np.float32))[:, None, None]
+
+class _NoTimer:
+    @contextmanager
+    def stage(self, name):
+        yield
+
+_NO_TIMER = _NoTimer()
+
+class FrameBatch:
+    """
+    Preallocated [batch_size,3,H,W] input tensor that BGR frames are
+    preprocessed into in place: OpenCV resize + BGR->RGB into reused uint8
+    buffers, then scale/normalize written straight into the batch slot.
+    No per-frame PIL images or intermediate tensors are allocated.
+
+    Output matches `preprocess` up to resampling differences (INTER_AREA vs
+    PIL's antialiased bilinear): mean |diff| is ~1e-2 in normalized units,
+    with larger isolated differences on sharp edges.
+    """
+    def __init__(self, batch_size=BATCH_SIZE, image_size=IMAGE_SIZE, device=DEVICE):
+        pin = device.startswith("cuda") and torch.cuda.is_available()
+        self.tensor = torch.empty((batch_size, 3, image_size, image_size),
+                                  dtype=torch.float32, pin_memory=pin)
+        self._array = self.tensor.numpy()   # shares memory with self.tensor
+        self._resized = np.empty((image_size, image_size, 3), dtype=np.uint8)
+        self._rgb = np.empty_like(self._resized)
+        self.image_size = image_size
+        self.indices = []
+        # (index, scored_index) of near-duplicate frames that reuse the
+        # prediction of a frame in this or an earlier batch
+        self.reused = []
+        self.checkpoint = False     # last batch of an early-stop round (see early_stop_rounds)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def full(self):
+        return len(self.indices) == self.tensor.shape[0]
+
+    def clear(self):
+        self.indices = []
+        self.reused = []
+        self.checkpoint = False
+
+    def add(self, frame, index=None, timer=None):
+        timer = timer or _NO_TIMER
+        slot = self._array[len(self.indices)]
+        h, w = frame.shape[:2]
+        size = self.image_size
+        interp = cv2.INTER_AREA if (h >= size and w >= size) else cv2.INTER_LINEAR
+        with timer.stage("preprocess"):
+            cv2.resize(frame, (size, size), dst=self._resized, interpolation=interp)
+        with timer.stage("color"):
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        with timer.stage("preprocess"):
+            chw = self._rgb.transpose(2, 0, 1)
+            np.multiply(chw, _NORM_SCALE, out=slot)
+            np.subtract(slot, _NORM_OFFSET, out=slot)
+        self.indices.append(index)
+
+    def to(self, device=DEVICE):
+        """Filled part of the batch on `device` (a view, not a copy, on CPU)."""
+        return self.tensor[:len(self.indices)].to(device, non_blocking=True)
+
+def sample_indices(total, strategy=FRAME_SAMPLING, sample_rate=FRAME_SAMPLE_RATE,
+                   budget=FRAME_BUDGET, max_frames=MAX_SAMPLED_FRAMES, seed=0):
+    """
+    Frame indices (ascending) to score in a video of `total` frames.
+
+      - "stride":     every `sample_rate`-th frame (cost grows with length)
+      - "uniform":    `budget` frames at the centres of equal-length segments
+      - "stratified": `budget` frames, one at a random offset inside each
+                      segment (seeded, so reruns pick the same frames)
+
+    Whatever the strategy, at most `max_frames` indices are returned; a
+    stride sequence longer than that is thinned evenly across the timeline.
+    """
+    if total <= 0:
+        return []
+    if strategy == "stride":
+        if sample_rate < 1:
+            raise ValueError("sample rate must be >= 1")
+        indices = np.arange(0, total, sample_rate)
+        if max_frames and len(indices) > max_frames:
+            keep = np.linspace(0, len(indices) - 1, max_frames).round().astype(int)
+            indices = indices[keep]
+    elif strategy in ("uniform", "stratified"):
+        if budget < 1:
+            raise ValueError("frame budget must be >= 1")
+        n = min(budget, total)
+        if max_frames:
+            n = min(n, max_frames)
+        edges = np.arange(n + 1) * (total / n)
+        if strategy == "uniform":
+            offsets = np.full(n, 0.5)
+        else:
+            offsets = np.random.default_rng(seed).random(n)
+        indices = np.floor(edges[:-1] + offsets * (edges[1:] - edges[:-1])).astype(int)
+    else:
+        raise ValueError("Unknown frame sampling strategy: " + str(strategy))
+    return sorted(set(int(i) for i in indices))
+
+def early_stop_rounds(indices, min_frames=EARLY_STOP_MIN_FRAMES, checks=EARLY_STOP_CHECKS, seed=0):
+    """
+    Split sampled `indices` into rounds for early stopping: a seeded random
+    permutation cut after min_frames, 2 * min_frames, ... (at most `checks`
+    cuts), each round sorted again so it is decoded in one forward pass.
+    Every prefix of rounds is then a uniform random subset of the sampled
+    frames, spread over the whole timeline, which is what the Hoeffding
+    check at the end of a round assumes.
+    """
+    order = np.random.default_rng(seed).permutation(len(indices))
+    cuts = []
+    size = max(min_frames, 1)
+    while size < len(indices) and len(cuts) < checks:
+        cuts.append(size)
+        size *= 2
+    bounds = [0] + cuts + [len(indices)]
+    return [sorted(indices[i] for i in order[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+def keyframe_indices(video_path):
+    """
+    Sorted frame indices of the video's keyframes, read from the container by
+    demuxing packets with PyAV (nothing is decoded). None without PyAV.
+    """
+    try:
+        import av   # optional dependency, see requirements-optional.txt
+    except ImportError:
+        return None
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        packets = sorted((packet.pts, packet.is_keyframe) for packet in container.demux(stream)
+                         if packet.pts is not None)
+    return [index for index, (_, is_keyframe) in enumerate(packets) if is_keyframe]
+
+def read_sampled_frames(cap, indices, mode=FRAME_SEEK_MODE, keyframes=None):
+    """
+    Yield (index, frame) for each frame index in `indices` (ascending).
+
+    Only the sampled frames are decoded into BGR images:
+      - "grab": cap.grab() advances over skipped frames (no retrieve/convert),
+                cap.retrieve() is only called on sampled ones
+      - "seek": jump straight to each target with CAP_PROP_POS_FRAMES
+      - "auto": seek only when that skips decoding (`keyframes`, see
+                keyframe_indices), grab otherwise; without `keyframes` this
+                is plain grab
+
+    A seek decodes again from the keyframe before target - SEEK_BACKOFF, so
+    it only saves work when that keyframe lies past the current position;
+    within one GOP (keyframe interval) grabbing is cheaper.
+    """
+    if mode not in ("grab", "seek", "auto"):
+        raise ValueError("Unknown frame seek mode: " + str(mode))
+
+    pos = 0  # index of the next frame cap.grab() would return
+    for idx in indices:
+        gap = idx - pos
+        if gap < 0:
+            continue
+        if mode == "auto" and keyframes:
+            # keyframe a seek would decode from; seeking only helps past pos
+            k = bisect.bisect_right(keyframes, idx - SEEK_BACKOFF) - 1
+            seek = k >= 0 and keyframes[k] > pos
+        else:
+            seek = mode == "seek"
+        if seek:
+            if gap > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            pos = idx
+        else:
+            while pos < idx:
+                if not cap.grab():
+                    return
+                pos += 1
+        if not cap.grab():
+            return
+        pos += 1
+        ret, frame = cap.retrieve()
+        if not ret:
+            return
+        yield idx, frame
+
+def iter_video_batches(video_path, device=DEVICE, sampling=FRAME_SAMPLING,
+                       sample_rate=FRAME_SAMPLE_RATE, frame_budget=FRAME_BUDGET,
+                       max_frames=MAX_SAMPLED_FRAMES, batch_size=BATCH_SIZE):
+    """Yield preprocessed input batches (fresh tensors) for a video, for parity checks and calibration."""
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise RuntimeError("Cannot open video: " + video_path)
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        indices = sample_indices(total, sampling, sample_rate, frame_budget, max_frames)
+        batch = FrameBatch(batch_size, device="cpu")
+        for idx, frame in read_sampled_frames(cap, indices):
+            batch.add(frame, idx)
+            if batch.full():
+                yield batch.to(device).clone()
+                batch.clear()
+        if len(batch):
+            yield batch.to(device).clone()
+    finally:
+        cap.release()
 
-    frame_preds = []
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    for i in tqdm(range(total), desc="Frames", unit="frame"):
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if i % sample_rate != 0:
+def infer_batch(model, x):
+    """Run one forward pass over a [N,3,H,W] batch, return N fake probabilities."""
+    with torch.no_grad():
+        logits = model(x)               # shape [N,1]
+        probs = torch.sigmoid(logits).view(-1)  # probability of "fake"
+    return probs.cpu().tolist()         # single device sync per batch
+
+class StageTimer:
+    """Accumulates wall time per named stage (one instance per thread)."""
+    def __init__(self):
+        self.totals = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self, *others):
+        totals = dict(self.totals)
+        for other in others:
+            for name, seconds in other.totals.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return {name: round(seconds, 4) for name, seconds in totals.items()}
+
+def frame_dhash(frame):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail."""
+    small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = np.packbits(gray[:, 1:] > gray[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+def _get_until_stopped(q, stop):
+    """Blocking q.get() that gives up (returns None) once `stop` is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
             continue
-        # optional: detect/align face here using face detector (improves accuracy)
-        img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        x = preprocess(img).unsqueeze(0).to(device)
-        with torch.no_grad():
-            logits = model(x)           # shape [1,1]
-            prob = torch.sigmoid(logits).item()  # probability of "fake"
-            frame_preds.append(prob)
-    cap.release()
+    return None
+
+def _produce_batches(cap, rounds, seek_mode, free_batches, timer, stop,
+                     dedup_distance=None, dedup_window=DEDUP_WINDOW, keyframes=None):
+    """
+    Decode sampled frames and preprocess them into batches taken from `free_batches`.
+
+    `rounds` are ascending index lists decoded one after the other, rewinding
+    the video in between (see early_stop_rounds; one round otherwise). The
+    last batch of every round but the final one has batch.checkpoint set.
+
+    With `dedup_distance` set, a frame whose dHash is within that Hamming
+    distance of a recently scored frame is not preprocessed; it is recorded
+    in batch.reused so the consumer can copy the scored frame's probability.
+    """
+    scored_hashes = deque(maxlen=dedup_window)  # (dhash, index) of frames sent to the model
+    batch = None
+    for round_number, indices in enumerate(rounds):
+        if round_number:
+            with timer.stage("decode"):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        frames = read_sampled_frames(cap, indices, mode=seek_mode, keyframes=keyframes)
+        while True:
+            with timer.stage("decode"):
+                item = next(frames, None)
+            if item is None:
+                break
+            if batch is None:
+                # blocks while every buffer is queued or being inferred (backpressure)
+                batch = _get_until_stopped(free_batches, stop)
+                if batch is None:
+                    return
+            idx, frame = item
+            if dedup_distance is not None:
+                with timer.stage("dedup"):
+                    h = frame_dhash(frame)
+                    match = next((ref for ref_hash, ref in scored_hashes
+                                  if (h ^ ref_hash).bit_count() <= dedup_distance), None)
+                if match is not None:
+                    batch.reused.append((idx, match))
+                    continue
+                scored_hashes.append((h, idx))
+            # optional: detect/align face here using face detector (improves accuracy)
+            batch.add(frame, idx, timer=timer)
+            if batch.full():
+                yield batch
+                batch = None
+        # a round's last frames may all have gone into an already full batch:
+        # take an empty buffer to carry the checkpoint
+        if round_number < len(rounds) - 1:
+            if batch is None:
+                batch = _get_until_stopped(free_batches, stop)
+                if batch is None:
+                    return
+            batch.checkpoint = True
+        if batch is not None and (len(batch) or batch.reused or batch.checkpoint):
+            yield batch
+            batch = None
+
+_DONE = object()
+
+def _pipelined_batches(producer, stop, depth=PIPELINE_QUEUE_DEPTH):
+    """
+    Run `producer` in a decoder thread and yield its batches on the caller's
+    thread. The ready queue is bounded (and the producer can only fill as many
+    batches as there are free buffers), so decoding never runs far ahead of
+    inference. Closing this generator (normal exit, error, early break) stops
+    and joins the decoder thread; decoder errors are re-raised here.
+    """
+    ready = queue.Queue(maxsize=depth)
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode_loop():
+        try:
+            for batch in producer:
+                if not put(batch):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            producer.close()
+
+    thread = threading.Thread(target=decode_loop, name="frame-decoder", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def hoeffding_radius(n, delta=EARLY_STOP_DELTA):
+    """
+    Half-width of a two-sided Hoeffding confidence interval for the mean of
+    n values in [0, 1]: P(|sample mean - true mean| >= r) <= delta.
+    """
+    return math.sqrt(math.log(2.0 / delta) / (2.0 * n))
+
+def effective_samples(weights):
+    """Kish effective sample size (sum w)^2 / sum w^2 of a weighted mean; n for equal weights."""
+    return sum(weights) ** 2 / sum(w * w for w in weights)
+
+def verdict_settled(frame_preds, threshold=THRESHOLD, min_frames=EARLY_STOP_MIN_FRAMES,
+                    delta=EARLY_STOP_DELTA, weights=None):
+    """
+    True once the running mean is further than the confidence radius from
+    threshold. `frame_preds` are independent model outputs; `weights` (one
+    per prediction, default 1) give how many sampled frames each stands for
+    once near-duplicates reuse it, so the mean tested is the reported one.
+    The radius uses the effective sample size of those weights: counting
+    reused copies as samples would make the Hoeffding bound overconfident.
+    """
+    n = len(frame_preds)
+    if n < max(min_frames, 1):
+        return False
+    weights = weights or [1] * n
+    mean = sum(w * p for w, p in zip(weights, frame_preds)) / sum(weights)
+    return abs(mean - threshold) > hoeffding_radius(effective_samples(weights), delta)
+
+def log_timings(video_path, timings):
+    """Default timing hook: one log line per video on the "detect" logger."""
+    stages = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items())
+    logging.getLogger("detect").info("predict_video %s: %s", video_path, stages)
+
+def predict_video(video_path, model, **kwargs):
+    """
+    Score sampled frames of a video and average their fake probabilities.
+    Takes the same options as iter_predict_video and returns its final result.
+    """
+    for update in iter_predict_video(video_path, model, **kwargs):
+        if update["done"]:
+            return update["result"]
+
+def iter_predict_video(video_path, model, device=DEVICE, sample_rate=FRAME_SAMPLE_RATE,
+                       sampling=FRAME_SAMPLING, frame_budget=FRAME_BUDGET,
+                       max_frames=MAX_SAMPLED_FRAMES, seek_mode=FRAME_SEEK_MODE,
+                       batch_size=BATCH_SIZE, pipelined=PIPELINED,
+                       queue_depth=PIPELINE_QUEUE_DEPTH, early_stop=EARLY_STOP,
+                       min_frames=EARLY_STOP_MIN_FRAMES, delta=EARLY_STOP_DELTA,
+                       dedup=DEDUP_FRAMES, dedup_distance=DEDUP_MAX_DISTANCE,
+                       instrument=False, timing_hook=None):
+    """
+    Incremental detection: yields a progress dict after every batch
+    ({"done": False, "frames_scored", "frames_total", "running_probability",
+    "provisional_is_fake", "confidence_radius", ...}) and finally
+    {"done": True, "result": <predict_video result>}. Closing the generator
+    early stops decoding and releases the video.
+
+    Which frames are scored is decided by `sampling` (see sample_indices):
+    every `sample_rate`-th frame, or a fixed `frame_budget` spread over the
+    whole timeline; `max_frames` caps both.
+
+    With early_stop=True, the sampled frames are scored in rounds that are
+    random subsets spread over the whole timeline (early_stop_rounds), and
+    sampling ends once the running mean clears THRESHOLD by more than a
+    Hoeffding confidence radius. The check runs at the end of each round
+    (after `min_frames` inferred frames, then after each doubling, at most
+    EARLY_STOP_CHECKS times) with `delta` split evenly over the checks, so
+    the chance of any early verdict differing from the mean of all sampled
+    frames stays within `delta`. The mean tested is the reported one; reused
+    predictions weigh in there but only shrink the radius as model outputs
+    (see verdict_settled).
+    Every round is another decoding pass over the video. "stopped_early" in
+    the result tells whether sampling ended early.
+
+    With dedup=True, sampled frames whose perceptual hash is within
+    `dedup_distance` bits of a recently scored frame reuse its probability
+    instead of running the model; "inferred_frames" / "reused_frames" in the
+    result give the split.
+
+    With instrument=True (always when pipelined) the result carries
+    "timings": wall seconds spent in open, decode, color (BGR->RGB),
+    preprocess (resize + normalize), dedup, forward, aggregate, wait (model
+    thread idle, pipelined only) and total. They are also passed to
+    `timing_hook(video_path, timings)`, by default log_timings.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    start = time.perf_counter()
+    # decode_timer is only touched by the decoding thread, infer_timer by this one
+    decode_timer = StageTimer()
+    infer_timer = StageTimer()
+    with infer_timer.stage("open"):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise RuntimeError("Cannot open video: " + video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        keyframes = keyframe_indices(video_path) if seek_mode == "auto" else None
+    duration = total / fps if fps > 0 else 0.0
+
+    frame_preds = []
+    inferred_preds = []     # model outputs only: the independent samples early stop relies on
+    inferred_weights = []   # sampled frames each model output stands for (1 + times reused)
+    probs_by_index = {}     # scored frame index -> probability, for reused frames
+    position = {}           # scored frame index -> its slot in inferred_preds
+    inferred = 0
+    stopped_early = False
+    indices = sample_indices(total, sampling, sample_rate, frame_budget, max_frames)
+    rounds = early_stop_rounds(indices, min_frames) if early_stop else [indices]
+    check_delta = delta / max(len(rounds) - 1, 1)   # union bound over the checks
+
+    # free buffers: one is enough when serial; pipelined needs room for the
+    # queued batches plus the one being filled and the one being inferred
+    n_buffers = queue_depth + 2 if pipelined else 1
+    free_batches = queue.Queue()
+    for _ in range(n_buffers):
+        free_batches.put(FrameBatch(batch_size, device=device))
+
+    stop = threading.Event()
+    batches = _produce_batches(cap, rounds, seek_mode, free_batches, decode_timer, stop,
+                               dedup_distance=dedup_distance if dedup else None,
+                               keyframes=keyframes)
+    if pipelined:
+        batches = _pipelined_batches(batches, stop, depth=queue_depth)
+    try:
+        with tqdm(total=len(indices), desc="Frames", unit="frame") as bar:
+            while True:
+                if pipelined:
+                    with infer_timer.stage("wait"):
+                        batch = next(batches, None)
+                else:
+                    # serial: next() runs the producer here, already timed as decode/color/preprocess
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                if len(batch):
+                    with infer_timer.stage("forward"):
+                        probs = infer_batch(model, batch.to(device))
+                    probs_by_index.update(zip(batch.indices, probs))
+                    position.update((idx, len(inferred_preds) + i) for i, idx in enumerate(batch.indices))
+                    frame_preds.extend(probs)
+                    inferred_preds.extend(probs)
+                    inferred_weights.extend([1] * len(probs))
+                    inferred += len(probs)
+                frame_preds.extend(probs_by_index[ref] for _, ref in batch.reused)
+                for _, ref in batch.reused:
+                    inferred_weights[position[ref]] += 1
+                bar.update(len(batch) + len(batch.reused))
+                checkpoint = batch.checkpoint
+                batch.clear()
+                free_batches.put(batch)
+                if frame_preds:
+                    running = sum(frame_preds) / len(frame_preds)
+                    yield {
+                        "done": False,
+                        "frames_scored": len(frame_preds),
+                        "frames_total": len(indices),
+                        "inferred_frames": inferred,
+                        "running_probability": running,
+                        "provisional_is_fake": running > THRESHOLD,
+                        "confidence_radius": hoeffding_radius(effective_samples(inferred_weights), check_delta)
+                    }
+                if checkpoint and verdict_settled(inferred_preds, THRESHOLD, min_frames, check_delta,
+                                                  weights=inferred_weights):
+                    stopped_early = len(frame_preds) < len(indices)
+                    break
+    finally:
+        batches.close()
+        cap.release()
 
     if len(frame_preds) == 0:
         raise RuntimeError("No frames processed. Lower sample_rate or check video.")
 
-    avg_prob = float(np.mean(frame_preds))
-    is_fake = avg_prob > THRESHOLD
-    return {
+    with infer_timer.stage("aggregate"):
+        avg_prob = float(np.mean(frame_preds))
+        is_fake = avg_prob > THRESHOLD
+    result = {
         "avg_fake_probability": avg_prob,
         "is_fake": bool(is_fake),
-        "frame_count": len(frame_preds)
+        "frame_count": len(frame_preds),
+        "frames_scored": len(frame_preds),
+        "stopped_early": stopped_early,
+        "inferred_frames": inferred,
+        "reused_frames": len(frame_preds) - inferred,
+        "video_fps": round(fps, 3),
+        "video_duration": round(duration, 3)
+    }
+    if instrument or pipelined:
+        # when pipelined, decode/color/preprocess run on the decoder thread and
+        # forward/wait on this one, so total approaches max(...) not the sum
+        timings = decode_timer.report(infer_timer)
+        timings["total"] = round(time.perf_counter() - start, 4)
+        result["timings"] = timings
+        if instrument:
+            (timing_hook or log_timings)(video_path, timings)
+    yield {"done": True, "result": result}
+
+def iter_keyframes(video_path, max_frames=KEYFRAME_MAX_FRAMES):
+    """
+    Yield (frame index, BGR frame) for the video's keyframes only, decoded by
+    PyAV. A first pass demuxes packets without decoding anything to find the
+    keyframes; if there are more than `max_frames`, an evenly spaced subset is
+    kept. The second pass only feeds those packets to the decoder, which is
+    told to skip non-key frames (skip_frame="NONKEY"), so no P/B frame is
+    ever decoded. Returns the number of keyframes in the video.
+    """
+    import av   # optional dependency (requirements-optional.txt), only needed for fast scan
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        keyframes = [packet.pts for packet in container.demux(stream)
+                     if packet.is_keyframe and packet.pts is not None]
+        chosen = keyframes
+        if max_frames and len(keyframes) > max_frames:
+            picks = np.linspace(0, len(keyframes) - 1, max_frames).round().astype(int)
+            chosen = [keyframes[i] for i in picks]
+        chosen = set(chosen)
+
+        fps = float(stream.average_rate or 0)
+        container.seek(0, stream=stream)
+        stream.codec_context.skip_frame = "NONKEY"
+        for packet in container.demux(stream):
+            # the trailing empty packet flushes frames still buffered in the decoder
+            if packet.pts is not None and packet.pts not in chosen:
+                continue
+            for frame in packet.decode():
+                index = int(round(frame.time * fps)) if frame.time is not None else None
+                yield index, frame.to_ndarray(format="bgr24")
+    return len(keyframes)
+
+def _standard_decode_seconds(video_path, sampling=FRAME_SAMPLING, sample_rate=FRAME_SAMPLE_RATE,
+                             frame_budget=FRAME_BUDGET, max_frames=MAX_SAMPLED_FRAMES):
+    """Wall time predict_video's OpenCV path spends opening the video and decoding its sampled frames."""
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    try:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        indices = sample_indices(total, sampling, sample_rate, frame_budget, max_frames)
+        for _ in read_sampled_frames(cap, indices):
+            pass
+    finally:
+        cap.release()
+    return time.perf_counter() - start
+
+def fast_scan_video(video_path, model, device=DEVICE, max_frames=KEYFRAME_MAX_FRAMES,
+                    batch_size=BATCH_SIZE, compare_decode=False):
+    """
+    Quick first-pass verdict from keyframes (I-frames) only, see iter_keyframes.
+    Much cheaper to decode than predict_video on long videos, at the cost of
+    scoring fewer (and only keyframe-quality) frames.
+
+    The result has predict_video's verdict fields plus "keyframe_count" (in
+    the whole video) and "decode_seconds". With compare_decode=True the
+    standard sampled OpenCV decode of the same video is also timed, giving
+    "standard_decode_seconds" and "decode_saving" (fraction of that time saved).
+    """
+    start = time.perf_counter()
+    decode_seconds = 0.0
+    frame_preds = []
+    batch = FrameBatch(batch_size, device=device)
+    keyframes = iter_keyframes(video_path, max_frames)
+    keyframe_count = 0
+    while True:
+        tick = time.perf_counter()
+        try:
+            index, frame = next(keyframes)
+        except StopIteration as done:
+            keyframe_count = done.value
+            decode_seconds += time.perf_counter() - tick
+            break
+        decode_seconds += time.perf_counter() - tick
+        batch.add(frame, index)
+        if batch.full():
+            frame_preds.extend(infer_batch(model, batch.to(device)))
+            batch.clear()
+    if len(batch):
+        frame_preds.extend(infer_batch(model, batch.to(device)))
+
+    if len(frame_preds) == 0:
+        raise RuntimeError("No keyframes decoded. Check video: " + video_path)
+
+    avg_prob = float(np.mean(frame_preds))
+    result = {
+        "avg_fake_probability": avg_prob,
+        "is_fake": bool(avg_prob > THRESHOLD),
+        "frame_count": len(frame_preds),
+        "frames_scored": len(frame_preds),
+        "mode": "keyframes",
+        "keyframe_count": keyframe_count,
+        "decode_seconds": round(decode_seconds, 4),
+        "total_seconds": round(time.perf_counter() - start, 4)
     }
+    if compare_decode:
+        standard = _standard_decode_seconds(video_path)
+        result["standard_decode_seconds"] = round(standard, 4)
+        result["decode_saving"] = round(1 - decode_seconds / standard, 4) if standard > 0 else 0.0
+    return result
+
+def _done_hashes(out_path):
+    """SHA-256s already scored successfully in an existing JSONL output (for resume)."""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue    # a line cut short by a crash
+            if "error" not in record and record.get("sha256"):
+                done.add(record["sha256"])
+    return done
+
+def run_batch(inputs, out_path, workers=1, load_kwargs=None, **options):
+    """
+    Score many videos on a process pool (one model per worker) and append
+    one JSON line per video to `out_path` as results arrive. Videos whose
+    hash already has a result line in `out_path` are skipped, so a crashed
+    run can be resumed by re-running the same command. `load_kwargs` go to
+    each worker's load_model(), `options` to predict_video().
+    """
+    from concurrent.futures import as_completed
+    from inference_pool import InferencePool
+
+    paths = expand_inputs(inputs)
+    done = _done_hashes(out_path)
+    start = time.perf_counter()
+    hashes = hash_files(paths)  # thread pool, cached while a file is unchanged
+    hash_seconds = (time.perf_counter() - start) / max(len(paths), 1)  # per-video share
+    todo = []
+    for path in paths:
+        video_hash = hashes[path]
+        if video_hash in done:
+            continue
+        done.add(video_hash)    # identical files in the input are scored once
+        todo.append((path, video_hash, hash_seconds))
+    print(f"{len(paths)} videos, {len(paths) - len(todo)} already scored or duplicate, "
+          f"{len(todo)} to score on {workers} worker(s)")
+    if not todo:
+        return
+
+    pool = InferencePool(workers=workers, **(load_kwargs or {}))
+    scored = failed = 0
+    try:
+        futures = {pool.submit(path, pipelined=True, **options): (path, video_hash, hash_seconds)
+                   for path, video_hash, hash_seconds in todo}
+        with open(out_path, "a", encoding="utf-8") as out:
+            for future in as_completed(futures):
+                path, video_hash, hash_seconds = futures[future]
+                record = {"path": path, "sha256": video_hash}
+                try:
+                    res = future.result()
+                    record.update({
+                        "avg_fake_probability": res["avg_fake_probability"],
+                        "is_fake": res["is_fake"],
+                        "verdict": "FAKE" if res["is_fake"] else "REAL",
+                        "frame_count": res["frame_count"],
+                        "stopped_early": res.get("stopped_early", False),
+                        "timings": dict(res.get("timings", {}), hash=round(hash_seconds, 4))
+                    })
+                    scored += 1
+                except Exception as e:
+                    record["error"] = str(e)
+                    failed += 1
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                print(f"[{scored + failed}/{len(todo)}] {record.get('verdict', 'ERROR'):<5} {path}")
+    finally:
+        pool.shutdown()
+    print(f"✅ {scored} scored, {failed} failed -> {out_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python detect.py input_video.mp4")
-        sys.exit(1)
-    video_file = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description="Deepfake detection. One video file prints its result; several inputs, "
+                    "directories or globs run batch mode and write JSON lines to --out.")
+    parser.add_argument("inputs", nargs="*", help="video files, directories or glob patterns")
+    parser.add_argument("--out", help="batch mode: JSONL output, appended to and used to resume "
+                                      "(default: detect_results.jsonl)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="batch mode: worker processes, one model each (default: %(default)s)")
+    parser.add_argument("--build-artifact", action="store_true",
+                        help="write the offline model artifact (MODEL_ARTIFACT_PATH) and exit")
+    parser.add_argument("--sampling", choices=["stride", "uniform", "stratified"], default=FRAME_SAMPLING,
+                        help="frame sampling strategy (default: %(default)s)")
+    parser.add_argument("--sample-rate", type=int, default=FRAME_SAMPLE_RATE,
+                        help="stride: score 1 frame every N frames (default: %(default)s)")
+    parser.add_argument("--frame-budget", type=int, default=FRAME_BUDGET,
+                        help="uniform/stratified: frames scored per video (default: %(default)s)")
+    parser.add_argument("--max-frames", type=int,
+                        help=f"cap on scored frames, 0 for none (default: {MAX_SAMPLED_FRAMES}, "
+                             f"or {KEYFRAME_MAX_FRAMES} keyframes with --fast-scan)")
+    parser.add_argument("--backend", choices=BACKENDS, default=INFERENCE_BACKEND,
+                        help="inference engine (default: %(default)s, see backends.py)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=PRECISION,
+                        help="numeric precision for eager/compile backends (default: %(default)s)")
+    parser.add_argument("--channels-last", action="store_true", default=CHANNELS_LAST,
+                        help="run convolutions in NHWC (channels_last) layout")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="sampled frames per forward pass (default: %(default)s)")
+    parser.add_argument("--pipelined", action="store_true", default=PIPELINED,
+                        help="decode in a background thread while the model runs")
+    parser.add_argument("--fast-scan", action="store_true",
+                        help="single video: quick verdict from keyframes only (needs PyAV)")
+    parser.add_argument("--compare-decode", action="store_true",
+                        help="with --fast-scan: also time the standard decode path and report the saving")
+    parser.add_argument("--instrument", action="store_true",
+                        help="report per-stage wall time (open, decode, color, preprocess, forward, ...)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="single video: write a profile to PATH (cProfile .prof, or a "
+                             "Chrome trace .json with --profiler torch)")
+    parser.add_argument("--profiler", choices=["cprofile", "torch"], default="cprofile",
+                        help="profiler used by --profile (default: %(default)s)")
+    parser.add_argument("--dedup", action="store_true", default=DEDUP_FRAMES,
+                        help="reuse predictions for near-duplicate frames (perceptual hash)")
+    parser.add_argument("--dedup-distance", type=int, default=DEDUP_MAX_DISTANCE,
+                        help="max dHash Hamming distance treated as duplicate (default: %(default)s)")
+    parser.add_argument("--early-stop", action="store_true", default=EARLY_STOP,
+                        help="stop once the verdict is settled (Hoeffding bound)")
+    parser.add_argument("--min-frames", type=int, default=EARLY_STOP_MIN_FRAMES,
+                        help="minimum frames scored before early stop (default: %(default)s)")
+    parser.add_argument("--delta", type=float, default=EARLY_STOP_DELTA,
+                        help="early stop error tolerance (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.build_artifact:
+        print("✅ Model artifact written:", build_model_artifact())
+        sys.exit(0)
+    if not args.inputs:
+        parser.error("at least one video, directory or glob is required")
+
+    max_frames = MAX_SAMPLED_FRAMES if args.max_frames is None else args.max_frames
+    options = dict(sample_rate=args.sample_rate, sampling=args.sampling,
+                   frame_budget=args.frame_budget, max_frames=max_frames,
+                   batch_size=args.batch_size, dedup=args.dedup, dedup_distance=args.dedup_distance,
+                   early_stop=args.early_stop, min_frames=args.min_frames, delta=args.delta)
+    single = len(args.inputs) == 1 and os.path.isfile(args.inputs[0]) and not args.out
+    if args.fast_scan and not single:
+        parser.error("--fast-scan scores a single video file")
+    if not single:
+        load_kwargs = dict(backend=args.backend, precision=args.precision,
+                           channels_last=args.channels_last)
+        run_batch(args.inputs, args.out or "detect_results.jsonl", workers=args.workers,
+                  load_kwargs=load_kwargs, **options)
+        sys.exit(0)
+
+    video_file = args.inputs[0]
     print("Video SHA256:", compute_file_sha256(video_file))
-    model = load_model()
-    res = predict_video(video_file, model)
+    model = load_model(backend=args.backend, precision=args.precision,
+                       channels_last=args.channels_last)
+    if args.instrument:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.fast_scan:
+        keyframes = KEYFRAME_MAX_FRAMES if args.max_frames is None else args.max_frames
+        run = lambda: fast_scan_video(video_file, model, max_frames=keyframes,
+                                      batch_size=args.batch_size, compare_decode=args.compare_decode)
+    else:
+        run = lambda: predict_video(video_file, model, pipelined=args.pipelined,
+                                    instrument=args.instrument, **options)
+    if not args.profile:
+        res = run()
+    elif args.profiler == "torch":
+        from torch.profiler import ProfilerActivity, profile
+        activities = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if DEVICE == "cuda" else [])
+        with profile(activities=activities, record_shapes=True) as prof:
+            res = run()
+        prof.export_chrome_trace(args.profile)
+        print(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=20))
+        print("Torch profiler trace written:", args.profile, "(open in chrome://tracing or Perfetto)")
+    else:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        res = profiler.runcall(run)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+        print("cProfile stats written:", args.profile, "(view with snakeviz or pstats)")
     print("Result:", res)
@@ -0,0 +1,129 @@
+# hashing.py
+# SHA-256 of video files. One place for every hash the project computes:
+#   sha256_file       one reused readinto() buffer (no per-chunk allocation)
+#   sha256_file_mmap  hash straight from a read-only memory map
+#   hash_file         sha256_file behind a persistent cache keyed by
+#                     (path, inode, size, mtime_ns), so unchanged files are
+#                     never re-read
+#   hash_files        hash_file over a thread pool; hashlib releases the GIL
+#                     on large updates, so files are hashed in parallel
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_BUFFER_SIZE = 2**20            # bytes per readinto(); larger buffers fall out of L2 and hash slower
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+HASH_CACHE_PATH = os.getenv("HASH_CACHE_PATH", "cache/hashes.sqlite3")
+
+def sha256_file(path, buffer_size=HASH_BUFFER_SIZE):
+    """Hex SHA-256 of a file, read into one reused buffer."""
+    h = hashlib.sha256()
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+def sha256_file_mmap(path):
+    """Hex SHA-256 of a file through a read-only memory map."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()    # empty files can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            h.update(mm)
+    return h.hexdigest()
+
+class HashCache:
+    """SQLite cache of file hashes, valid while a file's inode, size and mtime_ns are unchanged."""
+
+    def __init__(self, path=HASH_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # shared by the hashing threads, serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                hashed REAL NOT NULL
+            )""")
+
+    def get(self, path, st):
+        """Cached hash for `path` if its stat `st` still matches, else None."""
+        with self._lock:
+            row = self._conn.execute("SELECT inode, size, mtime_ns, sha256 FROM hashes WHERE path = ?",
+                                     (path,)).fetchone()
+            if row is None or tuple(row[:3]) != (st.st_ino, st.st_size, st.st_mtime_ns):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[3]
+
+    def put(self, path, st, sha256):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (path, inode, size, mtime_ns, sha256, hashed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, st.st_ino, st.st_size, st.st_mtime_ns, sha256, time.time()))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    """Process-wide HashCache at HASH_CACHE_PATH, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HashCache()
+    return _default_cache
+
+def hash_file(path, cache=None):
+    """
+    Hex SHA-256 of a file, answered from `cache` (default: default_cache())
+    when the file is unchanged since it was last hashed. cache=False
+    always reads the file.
+    """
+    if cache is False:
+        return sha256_file(path)
+    cache = cache or default_cache()
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    sha256 = cache.get(key, st)
+    if sha256 is None:
+        sha256 = sha256_file(key)
+        # only trust the hash if the file didn't change while it was read
+        after = os.stat(key)
+        if (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            cache.put(key, st, sha256)
+    return sha256
+
+def hash_files(paths, workers=HASH_WORKERS, cache=None):
+    """{path: hex SHA-256} for many files, hashed concurrently on `workers` threads."""
+    paths = list(paths)
+    if not paths:
+        return {}
+    if cache is None:
+        cache = default_cache()     # opened once here, not raced for by the threads
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        return dict(zip(paths, pool.map(lambda p: hash_file(p, cache), paths)))
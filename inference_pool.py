@@ -0,0 +1,72 @@
+# inference_pool.py
+# Pool of inference worker processes, each holding its own model and a fixed
+# torch thread budget, so concurrent uploads don't fight over one intra-op
+# thread pool.
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))    # 0 = run inline in the request thread
+THREADS_PER_WORKER = int(os.getenv("THREADS_PER_WORKER", "0"))  # 0 = split the cores evenly
+PIN_WORKER_CPUS = os.getenv("PIN_WORKER_CPUS", "1") == "1"      # give each worker a disjoint CPU set
+
+_model = None   # per worker process, set by _init_worker
+
+def _init_worker(threads, pin, counter, load_kwargs):
+    global _model
+    import torch
+    from detect import load_model
+
+    with counter.get_lock():
+        slot = counter.value
+        counter.value += 1
+    if pin and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        start = (slot * threads) % len(cpus)
+        os.sched_setaffinity(0, [cpus[(start + i) % len(cpus)] for i in range(threads)])
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _model = load_model(**load_kwargs)
+
+def _predict(video_path, options):
+    from detect import predict_video
+    return predict_video(video_path, _model, **options)
+
+def _ready(hold):
+    time.sleep(hold)   # keep this worker busy so the next warm-up task lands on another one
+    return os.getpid()
+
+class InferencePool:
+    """
+    N spawned processes, each with its own model (detect.load_model) and
+    torch.set_num_threads(threads_per_worker). predict()/submit() run
+    detect.predict_video in whichever worker is free.
+    """
+    def __init__(self, workers=INFERENCE_WORKERS, threads_per_worker=THREADS_PER_WORKER,
+                 pin=PIN_WORKER_CPUS, **load_kwargs):
+        if workers < 1:
+            raise ValueError("InferencePool needs at least one worker")
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, cpus // workers)
+        # spawn, not fork: forking a process that already has OpenMP threads can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init_worker,
+            initargs=(self.threads_per_worker, pin, ctx.Value("i", 0), load_kwargs))
+
+    def submit(self, video_path, **options):
+        """Future resolving to predict_video(video_path, model, **options)."""
+        return self._executor.submit(_predict, video_path, options)
+
+    def predict(self, video_path, **options):
+        return self.submit(video_path, **options).result()
+
+    def warm_up(self, hold=0.5):
+        """Start every worker and load its model before the first real request."""
+        futures = [self._executor.submit(_ready, hold) for _ in range(self.workers)]
+        return sorted(set(f.result() for f in futures))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,222 @@
+# job_queue.py
+# Persistent background job queue for video analysis. Jobs live in SQLite so
+# they survive restarts and can be shared by several app processes; worker
+# threads claim them one at a time. A running job heartbeats whenever its
+# handler calls check_cancelled() (between stages and detection batches); one
+# whose heartbeat is older than JOB_STALE_AFTER (its process died or was
+# restarted) is claimed again. Cancellation is cooperative: the job stops at
+# its next check_cancelled(). report_progress() stores the handler's latest
+# progress dict with the job, for status pages and progress streams.
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))   # analysis threads per app process
+JOB_RETENTION = 7 * 24 * 3600       # seconds finished jobs are kept before cleanup
+JOB_CLEANUP_INTERVAL = 3600         # seconds between cleanup passes
+JOB_POLL_INTERVAL = 1.0             # seconds an idle worker waits before re-checking the queue
+JOB_STALE_AFTER = 120               # seconds without a heartbeat before a running job is claimed again
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """Raised by check_cancelled() inside a handler when its job was cancelled."""
+
+class JobQueue:
+    """
+    SQLite-backed FIFO of jobs. `handler(payload, check_cancelled,
+    report_progress)` runs on a worker thread and returns a JSON-serializable
+    result; an exception marks the job failed, JobCancelled marks it
+    cancelled. report_progress(dict) replaces the job's progress.
+    """
+
+    def __init__(self, handler, path=JOB_DB_PATH, workers=JOB_WORKERS, retention=JOB_RETENTION,
+                 cleanup_interval=JOB_CLEANUP_INTERVAL, stale_after=JOB_STALE_AFTER):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.handler = handler
+        self.path = path
+        self.workers = workers
+        self.retention = retention
+        self.cleanup_interval = cleanup_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._last_cleanup = 0.0
+        # shared by the request and worker threads (serialized by _lock); other
+        # processes using the same file are serialized by BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                heartbeat REAL,
+                progress TEXT
+            )""")
+        # databases created before heartbeats / progress
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("heartbeat", "REAL"), ("progress", "TEXT")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created)")
+
+    def start(self):
+        """
+        Start the worker threads. Nothing is re-queued here: jobs interrupted
+        by a restart go stale and are claimed again, so processes sharing the
+        database can start (and restart) at any time.
+        """
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wakeup.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def submit(self, payload):
+        """Queue a job and return its id."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("INSERT INTO jobs (id, status, payload, created) VALUES (?, ?, ?, ?)",
+                               (job_id, QUEUED, json.dumps(payload), time.time()))
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Job dict (id, status, payload, result, error, timestamps, progress) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, result, error, cancel_requested, created, started, finished, "
+                "progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "payload": json.loads(row[2]),
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "cancel_requested": bool(row[5]),
+            "created": row[6],
+            "started": row[7],
+            "finished": row[8],
+            "progress": json.loads(row[9]) if row[9] else None
+        }
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: a queued one is cancelled at once, a running one stops at
+        its next check_cancelled(). False if the job is unknown or finished.
+        """
+        now = time.time()
+        with self._lock:
+            if self._conn.execute("UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status = ?",
+                                  (CANCELLED, now, job_id, QUEUED)).rowcount:
+                return True
+            return self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                                      (job_id, RUNNING)).rowcount > 0
+
+    def cancel_requested(self, job_id):
+        """Whether a cancel was asked for; also the running job's heartbeat."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ?",
+                               (time.time(), job_id, RUNNING))
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def set_progress(self, job_id, progress):
+        """Replace a running job's progress (a JSON-serializable dict); also a heartbeat."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                               (json.dumps(progress), time.time(), job_id, RUNNING))
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def cleanup(self, now=None):
+        """Delete finished jobs older than the retention period. Returns how many were removed."""
+        cutoff = (now or time.time()) - self.retention
+        marks = ",".join("?" * len(FINISHED))
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM jobs WHERE status IN ({marks}) AND finished < ?",
+                                      (*FINISHED, cutoff)).rowcount
+
+    def _claim(self):
+        """
+        Atomically move the oldest queued (or stale running) job to running;
+        (id, payload) or None.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = ? "
+                    "OR (status = ? AND COALESCE(heartbeat, started, 0) < ?) "
+                    "ORDER BY created LIMIT 1", (QUEUED, RUNNING, now - self.stale_after)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE jobs SET status = ?, started = ?, heartbeat = ? WHERE id = ?",
+                                       (RUNNING, now, now, row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? WHERE id = ?",
+                               (status, json.dumps(result) if result is not None else None,
+                                error, time.time(), job_id))
+
+    def _work(self):
+        while not self._stop.is_set():
+            if time.time() - self._last_cleanup > self.cleanup_interval:
+                self._last_cleanup = time.time()
+                self.cleanup()
+            claimed = self._claim()
+            if claimed is None:
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            job_id, payload = claimed
+
+            def check_cancelled():
+                if self.cancel_requested(job_id):
+                    raise JobCancelled(job_id)
+
+            def report_progress(progress):
+                self.set_progress(job_id, progress)
+
+            try:
+                result = self.handler(payload, check_cancelled, report_progress)
+            except JobCancelled:
+                self._finish(job_id, CANCELLED)
+            except Exception as e:
+                traceback.print_exc()
+                self._finish(job_id, FAILED, error=str(e))
+            else:
+                self._finish(job_id, DONE, result=result)
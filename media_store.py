@@ -0,0 +1,163 @@
+# media_store.py
+# Content-addressed store for uploaded videos: every file lives at
+# <root>/<sha[:2]>/<sha>, so identical uploads are stored once and different
+# videos that share a client filename can't overwrite each other. The store
+# is capped at a byte quota; the least recently used objects (by mtime, which
+# add/get refresh) are evicted past it. A sweeper thread removes upload temp
+# files orphaned by crashed or aborted requests.
+import glob
+import os
+import shutil
+import threading
+import time
+
+from uploads import UPLOAD_TEMP_PREFIX, HashingSpool
+from utils import compute_file_sha256
+
+MEDIA_STORE_PATH = os.getenv("MEDIA_STORE_PATH", "media")
+MEDIA_STORE_QUOTA = int(os.getenv("MEDIA_STORE_QUOTA_MB", "5120")) * 2**20   # 0 = unlimited
+MEDIA_TEMP_MAX_AGE = 3600       # seconds before an unfinished upload temp file counts as orphaned
+MEDIA_SWEEP_INTERVAL = 600      # seconds between sweeper passes
+
+class MediaStore:
+    """SHA-256 keyed file store with dedup, LRU quota eviction and a temp-file sweeper."""
+
+    def __init__(self, root=MEDIA_STORE_PATH, quota=MEDIA_STORE_QUOTA, temp_max_age=MEDIA_TEMP_MAX_AGE):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.quota = quota
+        self.temp_max_age = temp_max_age
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    def path_for(self, video_hash):
+        return os.path.join(self.root, video_hash[:2], video_hash)
+
+    def add_upload(self, file):
+        """
+        Store an uploaded FileStorage; returns (sha256, path). Uploads received
+        by uploads.UploadRequest are moved into place without a copy.
+        """
+        if isinstance(file.stream, HashingSpool):
+            video_hash = file.stream.hexdigest()
+            return video_hash, self._add(video_hash, file.stream.commit)
+        temp_path = os.path.join(self.root, f"{UPLOAD_TEMP_PREFIX}{os.getpid()}-{threading.get_ident()}.part")
+        file.save(temp_path)
+        return self.add_file(temp_path, move=True)
+
+    def add_file(self, path, move=False):
+        """Add a file from disk (hard-linked, or moved with move=True); returns (sha256, path)."""
+        video_hash = compute_file_sha256(path)
+
+        def place(dest):
+            if move:
+                os.replace(path, dest)
+                return
+            try:
+                os.link(path, dest)
+            except OSError:     # other filesystem / no hard links: fall back to a copy
+                shutil.copyfile(path, dest + ".tmp")
+                os.replace(dest + ".tmp", dest)
+
+        stored = self._add(video_hash, place)
+        if move and os.path.exists(path):
+            os.remove(path)     # duplicate content: the stored copy was kept
+        return video_hash, stored
+
+    def _add(self, video_hash, place):
+        dest = self.path_for(video_hash)
+        with self._lock:
+            if os.path.exists(dest):
+                os.utime(dest)  # duplicate: keep the existing object, mark it recently used
+            else:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                place(dest)
+            self._evict(protect=dest)
+        return dest
+
+    def get(self, video_hash):
+        """Path of a stored video (marked recently used), or None."""
+        path = self.path_for(video_hash)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _objects(self):
+        """(mtime, size, path) of every stored object."""
+        objects = []
+        for path in glob.glob(os.path.join(self.root, "??", "*")):
+            if os.path.basename(path).startswith(".") or path.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            objects.append((st.st_mtime, st.st_size, path))
+        return objects
+
+    def _evict(self, protect=None):
+        if not self.quota:
+            return 0
+        objects = sorted(self._objects())
+        used = sum(size for _, size, _ in objects)
+        removed = 0
+        for _, size, path in objects:
+            if used <= self.quota:
+                break
+            if path == protect:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            used -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def sweep(self, now=None):
+        """Remove orphaned upload temp files older than temp_max_age; returns how many."""
+        cutoff = (now or time.time()) - self.temp_max_age
+        removed = 0
+        for path in glob.glob(os.path.join(self.root, UPLOAD_TEMP_PREFIX + "*")):
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def start_sweeper(self, interval=MEDIA_SWEEP_INTERVAL):
+        """Background thread: sweep temp files and enforce the quota every `interval` seconds."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    swept = self.sweep()
+                    with self._lock:
+                        evicted = self._evict()
+                    if swept or evicted:
+                        print(f"✅ Media store sweep: {swept} orphaned temp file(s), {evicted} object(s) evicted")
+                except Exception as e:
+                    print(f"⚠️ Media store sweep failed: {e}")
+
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=run, name="media-sweeper", daemon=True)
+            self._sweeper.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        objects = self._objects()
+        return {
+            "objects": len(objects),
+            "bytes": sum(size for _, size, _ in objects),
+            "quota": self.quota,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,210 @@
+# migrate_registry.py
+# Move a MediaRegistry v1 deployment (string keys) to MediaRegistryV2 (bytes32
+# keys). Every v1 MediaRegistered event is replayed into v2's importMedia with
+# its original uploader and timestamp, then both contracts are compared hash
+# by hash. Only if they agree is contract/MediaRegistry.json switched to v2;
+# the v1 file is kept as contract/MediaRegistryV1.json. Hashes already in v2
+# are skipped, so running it again catches up with late v1 registrations.
+#
+#   python migrate_registry.py                  # deploy v2, replay, compare, switch
+#                                               # (after the switch: catch up from the kept v1 file)
+#   python migrate_registry.py --to 0xV2...     # replay into an existing v2 deployment
+#   python migrate_registry.py --close          # ... and disable importMedia for good
+#   python migrate_registry.py --gas-report     # v1 vs v2 gas on an in-process eth-tester chain
+import argparse
+import json
+import os
+import re
+import shutil
+
+from chain_index import CHAIN_INDEX_BATCH, CHAIN_INDEX_START_BLOCK
+from registry_client import REGISTRY_JSON, RegistryClient, compile_registry, load_registry, registry_version
+
+MIGRATION_BATCH = 50        # registrations per importMedia transaction
+V1_BACKUP_JSON = "contract/MediaRegistryV1.json"
+GAS_REPORT_DESCRIPTION = "Verified Authentic Video"     # app.py's default description
+
+def v1_registrations(contract, from_block=CHAIN_INDEX_START_BLOCK, to_block=None):
+    """[(hash, description, uploader, timestamp)] from the v1 contract's MediaRegistered events."""
+    w3 = contract.w3
+    to_block = w3.eth.block_number if to_block is None else to_block
+    registrations = {}
+    for start in range(from_block, to_block + 1, CHAIN_INDEX_BATCH):
+        end = min(start + CHAIN_INDEX_BATCH - 1, to_block)
+        for log in contract.events.MediaRegistered().get_logs(from_block=start, to_block=end):
+            args = log["args"]
+            if not re.fullmatch(r"[0-9a-fA-F]{64}", args["hash"]):
+                print(f"⚠️ Skipping {args['hash']!r}: not a SHA-256 hex digest, has no bytes32 key")
+                continue
+            registrations.setdefault(args["hash"].lower(),
+                                     (args["hash"], args["description"], args["uploader"], args["timestamp"]))
+    return list(registrations.values())
+
+def migrate(v1, v2, send, from_block=CHAIN_INDEX_START_BLOCK, batch_size=MIGRATION_BATCH):
+    """
+    Replay v1 registrations into v2 and compare the two. `send(call)` submits a
+    contract call as a transaction and returns its receipt.
+    """
+    v1_client = RegistryClient(v1.w3, v1)
+    v2_client = RegistryClient(v2.w3, v2)
+    registrations = v1_registrations(v1, from_block)
+    present = v2_client.verify_many([row[0] for row in registrations])
+    pending = [row for row in registrations if not present[row[0]][0]]
+
+    gas_used = 0
+    transactions = 0
+    for i in range(0, len(pending), batch_size):
+        chunk = pending[i:i + batch_size]
+        receipt = send(v2.functions.importMedia(
+            [v2_client.key(row[0]) for row in chunk],
+            [row[1] for row in chunk],
+            [row[2] for row in chunk],
+            [row[3] for row in chunk]))
+        gas_used += receipt["gasUsed"]
+        transactions += 1
+        print(f"✅ Imported {min(i + batch_size, len(pending))}/{len(pending)} registration(s)")
+
+    hashes = [row[0] for row in registrations]
+    before, after = v1_client.verify_many(hashes), v2_client.verify_many(hashes)
+    mismatches = [h for h in hashes if before[h] != after[h]]
+    for media_hash in mismatches[:10]:
+        print(f"❌ {media_hash}: v1 {before[media_hash]} != v2 {after[media_hash]}")
+    return {
+        "registrations": len(registrations),
+        "imported": len(pending),
+        "transactions": transactions,
+        "gas_used": gas_used,
+        "mismatches": len(mismatches)
+    }
+
+def gas_report(v1_artifact=None, v2_artifact=None, samples=100):
+    """
+    Deploy v1 and v2 on an in-process eth-tester chain and print gas for
+    deployment, registration, verification and the v1 -> v2 migration.
+    Artifacts are (abi, bytecode); compiled from contract/*.sol by default.
+    """
+    from web3 import EthereumTesterProvider, Web3
+
+    v1_abi, v1_bytecode = v1_artifact or compile_registry("MediaRegistry")
+    v2_abi, v2_bytecode = v2_artifact or compile_registry("MediaRegistryV2")
+    w3 = Web3(EthereumTesterProvider())
+    account = w3.eth.accounts[0]
+
+    def send(call):
+        return w3.eth.wait_for_transaction_receipt(call.transact({"from": account}))
+
+    def deploy(abi, bytecode):
+        receipt = send(w3.eth.contract(abi=abi, bytecode=bytecode).constructor())
+        return w3.eth.contract(address=receipt.contractAddress, abi=abi), receipt["gasUsed"]
+
+    hashes = [f"{i:064x}" for i in range(1, samples + 1)]
+    missing = "f" * 64
+    rows = []
+    contracts = {}
+    for version, (abi, bytecode) in ((1, (v1_abi, v1_bytecode)), (2, (v2_abi, v2_bytecode))):
+        contract, deploy_gas = deploy(abi, bytecode)
+        client = RegistryClient(w3, contract)
+        assert client.version == version, f"expected a v{version} ABI"
+        register_gas = [send(client.register_call(h, GAS_REPORT_DESCRIPTION))["gasUsed"] for h in hashes]
+        batch_keys = [client.key(h) for h in hashes]
+        contracts[version] = contract
+        rows.append({
+            "deploy": deploy_gas,
+            "registerMedia": sum(register_gas) / len(register_gas),
+            "verifyMedia (registered)": contract.functions.verifyMedia(client.key(hashes[0])).estimate_gas(),
+            "verifyMedia (unregistered)": contract.functions.verifyMedia(client.key(missing)).estimate_gas(),
+            f"verifyMediaBatch ({samples}) per hash":
+                contract.functions.verifyMediaBatch(batch_keys).estimate_gas() / samples,
+        })
+
+    # migration: replay the v1 registrations into a fresh v2 and check it matches
+    target, _ = deploy(v2_abi, v2_bytecode)
+    stats = migrate(contracts[1], target, send, from_block=0)
+    assert stats["mismatches"] == 0 and stats["imported"] == samples, stats
+
+    v1_row, v2_row = rows
+    print(f"\nGas report ({samples} registrations, eth-tester; eth_call figures include the 21000 base)")
+    print(f"  {'':<34} {'v1':>12} {'v2':>12} {'saving':>8}")
+    for metric in v1_row:
+        saving = 1 - v2_row[metric] / v1_row[metric]
+        print(f"  {metric:<34} {v1_row[metric]:>12,.0f} {v2_row[metric]:>12,.0f} {saving:>8.1%}")
+    print(f"  {'importMedia per registration':<34} {'':>12} "
+          f"{stats['gas_used'] / stats['imported']:>12,.0f}   ({stats['transactions']} transaction(s))")
+    print("✅ Migration replay verified: v1 and v2 agree on every hash")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate a MediaRegistry v1 deployment to MediaRegistryV2")
+    parser.add_argument("--to", help="existing MediaRegistryV2 address (default: deploy a new one)")
+    parser.add_argument("--from-block", type=int, default=CHAIN_INDEX_START_BLOCK,
+                        help="v1 deployment block, where the event replay starts")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH,
+                        help="registrations per importMedia transaction")
+    parser.add_argument("--close", action="store_true",
+                        help="call closeMigration() on v2 once it matches v1")
+    parser.add_argument("--gas-report", action="store_true",
+                        help="compare v1 and v2 gas on an in-process eth-tester chain (needs eth-tester[py-evm] and solc)")
+    args = parser.parse_args(argv)
+
+    if args.gas_report:
+        gas_report()
+        return
+
+    from dotenv import load_dotenv
+    from web3 import Web3
+
+    load_dotenv()
+    private_key = os.getenv("PRIVATE_KEY")
+    account_address = os.getenv("ACCOUNT_ADDRESS")
+    w3 = Web3(Web3.HTTPProvider(os.getenv("GANACHE_URL")))
+    if not w3.is_connected():
+        raise SystemExit("❌ Cannot connect to GANACHE_URL")
+    if not private_key or not account_address:
+        raise SystemExit("❌ PRIVATE_KEY and ACCOUNT_ADDRESS must be set in .env")
+
+    def send(call):
+        tx = call.build_transaction({
+            "chainId": w3.eth.chain_id,
+            "from": account_address,
+            "nonce": w3.eth.get_transaction_count(account_address),
+            "gasPrice": w3.to_wei("20", "gwei")
+        })
+        signed_tx = w3.eth.account.sign_transaction(tx, private_key)
+        return w3.eth.wait_for_transaction_receipt(w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+
+    v1 = load_registry(w3)
+    switched = registry_version(v1) == 2
+    if switched:
+        # already migrated: catch up from the kept v1 file into the current v2
+        if not os.path.exists(V1_BACKUP_JSON):
+            raise SystemExit(f"❌ {REGISTRY_JSON} points at v2 and there is no {V1_BACKUP_JSON} to replay")
+        args.to = args.to or v1.address
+        v1 = load_registry(w3, V1_BACKUP_JSON)
+
+    v2_abi, v2_bytecode = compile_registry("MediaRegistryV2")
+    if args.to:
+        v2_address = Web3.to_checksum_address(args.to)
+    else:
+        v2_address = send(w3.eth.contract(abi=v2_abi, bytecode=v2_bytecode).constructor()).contractAddress
+        print(f"✅ Deployed MediaRegistryV2: {v2_address}")
+    v2 = w3.eth.contract(address=v2_address, abi=v2_abi)
+
+    stats = migrate(v1, v2, send, from_block=args.from_block, batch_size=args.batch_size)
+    print(f"✅ {stats['registrations']} v1 registration(s), {stats['imported']} imported in "
+          f"{stats['transactions']} transaction(s), {stats['gas_used']:,} gas")
+    if stats["mismatches"]:
+        raise SystemExit(f"❌ {stats['mismatches']} hash(es) differ between v1 and v2; "
+                         f"{REGISTRY_JSON} left on v1")
+
+    if not switched:
+        shutil.copyfile(REGISTRY_JSON, V1_BACKUP_JSON)
+        with open(REGISTRY_JSON, "w") as f:
+            json.dump({"address": v2_address, "abi": v2_abi}, f, indent=2)
+        print(f"✅ {REGISTRY_JSON} now points at v2 (v1 kept in {V1_BACKUP_JSON})")
+        print("⚠️ Restart the app; registrations still made on v1 are picked up by running this again")
+
+    if args.close:
+        send(v2.functions.closeMigration())
+        print("✅ importMedia closed")
+
+if __name__ == "__main__":
+    main()
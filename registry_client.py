@@ -0,0 +1,131 @@
+# registry_client.py
+# Client for both MediaRegistry deployments:
+#   v1  contract/MediaRegistry.sol    keyed by the 64-character hex string
+#   v2  contract/MediaRegistryV2.sol  keyed by the 32-byte digest (bytes32)
+# The version is read from the ABI; callers always pass hex hashes and get
+# verifyMedia-shaped (exists, description, uploader, timestamp) tuples back.
+#
+# Verifying many hashes without one eth_call per hash:
+#   contract   verifyMediaBatch: one eth_call per chunk of hashes
+#   rpc-batch  deployments without verifyMediaBatch: one JSON-RPC batch of
+#              verifyMedia eth_calls per chunk (one HTTP round trip)
+#   sequential providers that don't support JSON-RPC batches either
+# The first chunk decides the mode; later chunks reuse it.
+import json
+
+from web3.exceptions import Web3TypeError
+
+REGISTRY_JSON = "contract/MediaRegistry.json"   # address + ABI of the deployment in use
+REGISTRY_BATCH_SIZE = 200       # hashes per verifyMediaBatch call / JSON-RPC batch
+
+def load_registry(w3, path=REGISTRY_JSON):
+    """Contract object for the deployment recorded in `path`."""
+    with open(path, "r") as f:
+        contract_data = json.load(f)
+    return w3.eth.contract(address=contract_data["address"], abi=contract_data["abi"])
+
+def registry_version(contract):
+    """2 if the contract takes bytes32 keys (MediaRegistryV2), else 1."""
+    for entry in contract.abi:
+        if entry.get("type") == "function" and entry.get("name") == "verifyMedia":
+            return 2 if entry["inputs"][0]["type"] == "bytes32" else 1
+    return 1
+
+def media_key(media_hash):
+    """bytes32 key of a hex SHA-256 (MediaRegistryV2)."""
+    key = bytes.fromhex(media_hash[2:] if media_hash.startswith("0x") else media_hash)
+    if len(key) != 32:
+        raise ValueError(f"not a SHA-256 hex digest: {media_hash!r}")
+    return key
+
+def compile_registry(name="MediaRegistry"):
+    """ABI and bytecode of contract/<name>.sol, compiled with solc 0.8.0."""
+    from solcx import compile_standard, get_installed_solc_versions, install_solc
+
+    if "0.8.0" not in map(str, get_installed_solc_versions()):
+        # py-solc-x downloads from binaries.soliditylang.org; offline, copy a solc 0.8.0
+        # binary to ~/.solcx/solc-v0.8.0 instead
+        try:
+            install_solc("0.8.0")
+        except Exception as e:
+            raise SystemExit(f"❌ Cannot install solc 0.8.0: {e}")
+    with open(f"contract/{name}.sol", "r") as f:
+        source = f.read()
+    compiled = compile_standard({
+        "language": "Solidity",
+        "sources": {f"{name}.sol": {"content": source}},
+        "settings": {"outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}}
+    }, solc_version="0.8.0")
+    out = compiled["contracts"][f"{name}.sol"][name]
+    return out["abi"], out["evm"]["bytecode"]["object"]
+
+class RegistryClient:
+    """verifyMedia for one hash or many, batched as far as the deployment and provider allow."""
+
+    def __init__(self, w3, contract, chunk_size=REGISTRY_BATCH_SIZE):
+        self.w3 = w3
+        self.contract = contract
+        self.chunk_size = chunk_size
+        self.version = registry_version(contract)
+        self.mode = None    # "contract", "rpc-batch" or "sequential" once detected
+
+    def key(self, media_hash):
+        """Contract key for a hex hash: the string itself on v1, bytes32 on v2."""
+        return media_key(media_hash) if self.version == 2 else media_hash
+
+    def register_call(self, media_hash, description):
+        """registerMedia contract call for a hex hash (build_transaction/transact it)."""
+        return self.contract.functions.registerMedia(self.key(media_hash), description)
+
+    def verify(self, media_hash):
+        """(exists, description, uploader, timestamp) of one hash."""
+        return tuple(self.contract.functions.verifyMedia(self.key(media_hash)).call())
+
+    def verify_many(self, hashes, chunk_size=None):
+        """{hash: (exists, description, uploader, timestamp)} for many hashes, in chunked batch calls."""
+        hashes = list(dict.fromkeys(hashes))
+        chunk_size = chunk_size or self.chunk_size
+        results = {}
+        for i in range(0, len(hashes), chunk_size):
+            chunk = hashes[i:i + chunk_size]
+            results.update(zip(chunk, self._verify_chunk(chunk)))
+        return results
+
+    def _verify_chunk(self, chunk):
+        if self.mode in (None, "contract"):
+            try:
+                rows = self.verify_contract_batch(chunk)
+                self.mode = "contract"
+                return rows
+            except Exception:
+                # reverts/empty output on old deployments surface differently per provider
+                # (ContractLogicError, BadFunctionCallOutput, eth-tester's TransactionFailed);
+                # a node that is down fails again below, so only an established mode re-raises
+                if self.mode == "contract":
+                    raise
+                print("⚠️ verifyMediaBatch not available on this deployment, using JSON-RPC batches")
+                self.mode = "rpc-batch"
+        if self.mode == "rpc-batch":
+            try:
+                return self.verify_rpc_batch(chunk)
+            except Web3TypeError:
+                print("⚠️ Provider does not support JSON-RPC batches, verifying one hash per call")
+                self.mode = "sequential"
+        return self.verify_sequential(chunk)
+
+    def verify_contract_batch(self, chunk):
+        """One verifyMediaBatch eth_call for the whole chunk."""
+        keys = [self.key(media_hash) for media_hash in chunk]
+        found, descriptions, uploaders, timestamps = self.contract.functions.verifyMediaBatch(keys).call()
+        return [tuple(row) for row in zip(found, descriptions, uploaders, timestamps)]
+
+    def verify_rpc_batch(self, chunk):
+        """verifyMedia eth_calls for the whole chunk sent as one JSON-RPC batch."""
+        with self.w3.batch_requests() as batch:
+            for media_hash in chunk:
+                batch.add(self.contract.functions.verifyMedia(self.key(media_hash)))
+            return [tuple(row) for row in batch.execute()]
+
+    def verify_sequential(self, chunk):
+        """One verifyMedia eth_call per hash (the pre-batch behaviour)."""
+        return [self.verify(media_hash) for media_hash in chunk]
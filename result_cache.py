@@ -0,0 +1,89 @@
+# result_cache.py
+# Persistent cache of predict_video results, keyed by the video's SHA-256
+# plus everything that can change the result (model identity, sample rate,
+# threshold, sampling options). Re-submitted videos skip detection entirely.
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "cache/results.sqlite3")
+CACHE_MAX_ENTRIES = 10000           # least recently used entries beyond this are evicted
+CACHE_MAX_AGE = 30 * 24 * 3600      # seconds; older entries are evicted
+
+class ResultCache:
+    """SQLite-backed result cache with LRU size cap, age expiry and hit/miss counters."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_age=CACHE_MAX_AGE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # one connection shared by Flask's request threads, serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                video_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results(last_access)")
+
+    @staticmethod
+    def make_key(video_hash, model_id, **settings):
+        """Cache key for a video hash under a model identity and detection settings."""
+        return f"{video_hash}|{model_id}|{json.dumps(settings, sort_keys=True)}"
+
+    def get(self, key):
+        """Cached result dict for `key`, or None. Counts a hit or a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT result, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, video_hash, result):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, video_hash, result, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, video_hash, json.dumps(result), now, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        removed = 0
+        if self.max_age:
+            removed += self._conn.execute("DELETE FROM results WHERE created < ?",
+                                          (now - self.max_age,)).rowcount
+        if self.max_entries:
+            removed += self._conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results "
+                "ORDER BY last_access DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+        self.evictions += removed
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "max_age": self.max_age
+        }
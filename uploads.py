@@ -0,0 +1,111 @@
+# uploads.py
+# Single-pass upload ingestion. Flask normally spools an upload to a temp
+# file, file.save() copies it to its destination and compute_file_sha256
+# reads it back a third time. UploadRequest instead hands the multipart
+# parser a container that feeds every chunk to SHA-256 as it is written:
+#   - HashingSpool writes to a temp file inside UPLOAD_FOLDER (the media
+#     store), so storing it is just an os.replace and the hash is already known
+#   - HashingSink (views marked @hash_only) keeps nothing, the body never
+#     touches disk
+import hashlib
+import os
+import tempfile
+import time
+
+from flask import Request, current_app
+
+UPLOAD_WRITE_BUFFER = 4 * 2**20     # bytes buffered before each write to disk
+UPLOAD_TEMP_PREFIX = ".upload-"     # unfinished uploads: <UPLOAD_FOLDER>/.upload-*.part
+
+class HashingSpool:
+    """Upload container: a temp file in `directory` plus a running SHA-256 of what was written."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, prefix=UPLOAD_TEMP_PREFIX, suffix=".part")
+        self._file = os.fdopen(fd, "w+b", buffering=UPLOAD_WRITE_BUFFER)
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+        self.hash_seconds = 0.0     # time spent hashing, overlapped with receiving the body
+        self.committed = False
+
+    def write(self, data):
+        start = time.perf_counter()
+        self._sha256.update(data)
+        self.hash_seconds += time.perf_counter() - start
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def commit(self, path):
+        """Move the received file to `path` (same filesystem, no copy) and return its SHA-256."""
+        self._file.close()
+        os.replace(self.temp_path, path)
+        self.committed = True
+        return self.hexdigest()
+
+    def close(self):
+        # Flask closes request files at teardown: drop uploads that were never committed
+        self._file.close()
+        if not self.committed and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __getattr__(self, name):
+        # read/seek/readline/... for werkzeug's FileStorage
+        return getattr(self._file, name)
+
+class HashingSink:
+    """Upload container that only hashes: nothing is kept in memory or on disk."""
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+        self.closed = False
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def read(self, size=-1):
+        return b""
+
+    def readline(self, size=-1):
+        return b""
+
+    def seek(self, offset, whence=0):
+        return 0
+
+    def tell(self):
+        return 0
+
+    def close(self):
+        self.closed = True
+
+def hash_only(view):
+    """Mark a view whose uploads are only hashed, never stored (see HashingSink)."""
+    view.hash_only_upload = True
+    return view
+
+class UploadRequest(Request):
+    """Flask request class whose file uploads are hashed while they are received."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        view = current_app.view_functions.get(self.endpoint)
+        if getattr(view, "hash_only_upload", False):
+            return HashingSink()
+        return HashingSpool(current_app.config['UPLOAD_FOLDER'])
+
+def upload_sha256(file):
+    """SHA-256 of an uploaded FileStorage's content."""
+    if isinstance(file.stream, (HashingSpool, HashingSink)):
+        return file.stream.hexdigest()
+    h = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(2**20), b""):
+        h.update(chunk)
+    return h.hexdigest()
@@ -1,21 +1,33 @@
 # utils.py
-import hashlib
+import glob
+import os
 
-def compute_file_sha256(path, chunk_size=2**20):
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-            h.update(chunk)
-    return h.hexdigest()
+from hashing import HASH_BUFFER_SIZE, hash_file, sha256_file
+
+VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'flv', 'webm'}  # picked up from directories by expand_inputs
+
+def compute_file_sha256(path, chunk_size=HASH_BUFFER_SIZE):
+    """SHA-256 of a file, always read from disk (fresh uploads, benchmarks)."""
+    return sha256_file(path, chunk_size)
 
 
 def file_sha256(filepath):
-    """Compute SHA256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
\ No newline at end of file
+    """Compute SHA256 hash of a file (cached while the file is unchanged)"""
+    return hash_file(filepath)
+
+
+def expand_inputs(inputs):
+    """Video files from a mix of file paths, directories (recursive) and glob patterns."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(glob.glob(os.path.join(item, "**", "*"), recursive=True))
+        elif os.path.exists(item):
+            candidates = [item]
+        else:
+            candidates = sorted(glob.glob(item, recursive=True))
+        for path in candidates:
+            ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+            if os.path.isfile(path) and (ext in VIDEO_EXTENSIONS or path == item):
+                paths.append(path)
+    return list(dict.fromkeys(paths))   # de-duplicate, keep order
@@ -1,34 +1,105 @@
+# verify_video.py
+# Check whether videos are registered on the MediaRegistry contract.
+#
+#   python verify_video.py                          # sample_video.mp4
+#   python verify_video.py "real videos" clip.mp4   # files, directories (recursive) and globs
+#   python verify_video.py "real videos" --benchmark
+#
+# Files are hashed in parallel (hashing.hash_files) and verified in chunks of
+# --chunk-size hashes per call (see registry_client.py).
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
 from web3 import Web3
-import json
-from utils import file_sha256
 
-GANACHE_URL = "http://127.0.0.1:7545"
+from hashing import hash_files
+from registry_client import REGISTRY_BATCH_SIZE, RegistryClient, load_registry
+from utils import expand_inputs
+
+load_dotenv()
+GANACHE_URL = os.getenv("GANACHE_URL", "http://127.0.0.1:7545")
+
+def print_result(path, video_hash, result):
+    is_registered, desc, uploader, timestamp = result
+    print(f"\n{path}")
+    print("Video hash:", video_hash)
+    if is_registered:
+        print("✅ Video is registered on blockchain.")
+        print("Description:", desc)
+        print("Uploader:", uploader)
+        print("Timestamp:", timestamp)
+    else:
+        print("❌ Video not found on blockchain.")
+
+def benchmark(client, hashes, size, chunk_size):
+    """Per-hash verification cost: one call per hash vs verifyMediaBatch vs JSON-RPC batches."""
+    # pad with unregistered hashes so the per-hash figures aren't dominated by a handful of calls
+    hashes = list(dict.fromkeys(hashes))
+    hashes += [f"{i:064x}" for i in range(max(0, size - len(hashes)))]
+    chunks = [hashes[i:i + chunk_size] for i in range(0, len(hashes), chunk_size)]
+    methods = [
+        ("one call per hash", client.verify_sequential),
+        ("verifyMediaBatch", client.verify_contract_batch),
+        ("JSON-RPC batch", client.verify_rpc_batch),
+    ]
+    print(f"\nBenchmark: {len(hashes)} hashes, {len(chunks)} chunk(s) of up to {chunk_size}")
+    baseline = None
+    for name, method in methods:
+        try:
+            start = time.perf_counter()
+            results = [row for chunk in chunks for row in method(chunk)]
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            print(f"  {name:<18} ⚠️ unavailable ({type(e).__name__}: {e})")
+            continue
+        per_hash = elapsed / len(hashes)
+        baseline = baseline or per_hash
+        registered = sum(1 for row in results if row[0])
+        print(f"  {name:<18} {per_hash * 1e3:8.3f} ms/hash  {elapsed:7.3f} s total  "
+              f"{baseline / per_hash:6.1f}x  ({registered} registered)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify videos against the MediaRegistry contract")
+    parser.add_argument("inputs", nargs="*", default=["sample_video.mp4"],
+                        help="video files, directories (recursive) or glob patterns")
+    parser.add_argument("--chunk-size", type=int, default=REGISTRY_BATCH_SIZE,
+                        help="hashes per batch call")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compare per-hash cost of single calls, verifyMediaBatch and JSON-RPC batches")
+    parser.add_argument("--bench-hashes", type=int, default=1000,
+                        help="hashes per benchmark run (padded with unregistered hashes)")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        raise SystemExit("❌ No video files found")
+
+    # Connect to Ganache
+    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    assert w3.is_connected(), "❌ Ganache not connected"
 
-# Connect to Ganache
-w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
-assert w3.is_connected(), "❌ Ganache not connected"
+    # Load contract ABI + address (v1 or v2)
+    client = RegistryClient(w3, load_registry(w3), chunk_size=args.chunk_size)
 
-# Load contract ABI + address
-with open("contract/MediaRegistry.json", "r") as f:
-    contract_data = json.load(f)
+    start = time.perf_counter()
+    hashes = hash_files(paths)
+    hash_seconds = time.perf_counter() - start
 
-contract_address = contract_data["address"]
-contract_abi = contract_data["abi"]
+    start = time.perf_counter()
+    results = client.verify_many(hashes.values())
+    verify_seconds = time.perf_counter() - start
 
-contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+    for path, video_hash in hashes.items():
+        print_result(path, video_hash, results[video_hash])
 
-# Compute hash of the video
-video_path = "sample_video.mp4"
-video_hash = file_sha256(video_path)
-print("Video hash:", video_hash)
+    registered = sum(1 for video_hash in hashes.values() if results[video_hash][0])
+    print(f"\n{registered}/{len(paths)} registered — hashed in {hash_seconds:.2f}s, "
+          f"verified in {verify_seconds:.2f}s ({client.mode})")
 
-# Call verifyMedia from contract
-is_registered, desc, uploader, timestamp = contract.functions.verifyMedia(video_hash).call()
+    if args.benchmark:
+        benchmark(client, list(hashes.values()), args.bench_hashes, args.chunk_size)
 
-if is_registered:
-    print("✅ Video is registered on blockchain.")
-    print("Description:", desc)
-    print("Uploader:", uploader)
-    print("Timestamp:", timestamp)
-else:
-    print("❌ Video not found on blockchain.")
+if __name__ == "__main__":
+    main()